@@ -1,12 +1,12 @@
 import asyncio
 import logging
-import serial
 import struct
+from datetime import timedelta
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant, callback
 import json
 from homeassistant.helpers.template import Template
-from homeassistant.helpers.event import async_track_template_result, TrackTemplate
+from homeassistant.helpers.event import async_track_state_change_event
 from .const import (
     DOMAIN,
     CONF_SERIAL_PORT,
@@ -23,162 +23,119 @@ from .const import (
     CONF_WRITE_SERVICE,
     CONF_WRITE_ENTITY,
     CONF_WRITE_PAYLOAD,
+    CONF_UNMAPPED_POLICY,
+    CONF_REGISTER_TYPE,
+    CONF_DATA_TYPE,
+    CONF_WORD_ORDER,
+    CONF_BYTE_ORDER,
+    CONF_REGISTER_MAP,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_REALTIME,
+    CONF_SERVE_TCP,
 )
+from .bus import ModbusBus
+from .codec import DEFAULT_DATA_TYPE, RegisterCodec
+from .crc import append_crc
+from .dispatch import WriteDispatcher
+from .framer import RtuFramer
+from .limits import UpdateLimits
+from .realtime import RealtimeResponder
+from .registers import (
+    MAX_READ_BITS,
+    MAX_READ_REGISTERS,
+    MAX_WRITE_BITS,
+    MAX_WRITE_REGISTERS,
+    REGISTER_COIL,
+    REGISTER_DISCRETE_INPUT,
+    REGISTER_HOLDING,
+    UNMAPPED_EXCEPTION,
+    UNMAPPED_ZERO_FILL,
+)
+from .sensor import bus_sensors
+from .serial_io import SerialStream
+from .snapshot import RegisterSnapshot
+from .tcp import FRAMING_RTU_OVER_TCP, TCP_GAP_TOLERANCE, MbapFramer, ModbusTcpBus, is_tcp_port
+from .template_tracker import SharedTemplateTracker
+from .traffic import HA_UPDATE
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = ["sensor"]
+
 async def async_setup_entry(hass, config_entry):
     data = config_entry.data
     serial_port = data[CONF_SERIAL_PORT]
     baudrate = data[CONF_BAUDRATE]
-    slave_id = data[CONF_SLAVE_ID]
-    register_addr = data[CONF_REGISTER_ADDR]
-    # New flexible configuration
-    direction = data.get(CONF_DIRECTION, 'read_write')
-    read_mode = data.get(CONF_READ_MODE, 'template')
-    read_entity = data.get(CONF_READ_ENTITY)
-    read_attribute = data.get(CONF_READ_ATTRIBUTE)
-    scale = int(data.get(CONF_SCALE, 1) or 1)
-    template_str = data.get(CONF_TEMPLATE, "{{ 0 }}")
-    value_map = data.get(CONF_VALUE_MAP)
-    write_service = data.get(CONF_WRITE_SERVICE)
-    write_entity = data.get(CONF_WRITE_ENTITY)
-    write_payload = data.get(CONF_WRITE_PAYLOAD)
+    realtime = data.get(CONF_REALTIME, False)
 
     entry_id = config_entry.entry_id
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {
             "entries": {},
-            "serial_connection": None,
-            "serial_task": None,
-            "serial_port": serial_port,
-            "baudrate": baudrate,
+            "buses": {},
+            "writes": WriteDispatcher(hass, _dispatch_writes),
+            "templates": SharedTemplateTracker(hass, _make_template_result_handler(hass)),
+            "snapshot": RegisterSnapshot(hass),
         }
-    
-    # Check for duplicate slave_id + register_addr combinations
-    for existing_entry_id, existing_entry in hass.data[DOMAIN]["entries"].items():
-        if (existing_entry["slave_id"] == slave_id and 
-            existing_entry["register_addr"] == register_addr and 
-            existing_entry_id != entry_id):
-            _LOGGER.warning(f"Duplicate register detected: Slave {slave_id} Reg {register_addr} already exists in entry {existing_entry_id}")
-    
-    write_target = data.get("write_target")
-    hass.data[DOMAIN]["entries"][entry_id] = {
-        "slave_id": slave_id,
-        "register_addr": register_addr,
-        "value": 0,
-        "write_target": write_target,
-        "template_tracker": None,
-        "value_map": value_map,
-        "template_str": None,  # filled below after building from read config
-        "direction": direction,
-        "scale": scale,
-        "read_mode": read_mode,
-        "read_entity": read_entity,
-        "read_attribute": read_attribute,
-        "write_service": write_service,
-        "write_entity": write_entity,
-        "write_payload": write_payload,
-    }
-
-    # Build effective template string from config
-    effective_template_str = template_str or "{{ 0 }}"
-    if (read_mode == 'entity' or read_entity) and read_entity:
-        if read_attribute:
-            effective_template_str = f"{{{{ state_attr('{read_entity}', '{read_attribute}') }}}}"
-        else:
-            effective_template_str = f"{{{{ states('{read_entity}') }}}}"
-
-    hass.data[DOMAIN]["entries"][entry_id]["template_str"] = effective_template_str
+    # Last known values are in place before any bus answers a master
+    snapshot = hass.data[DOMAIN]["snapshot"]
+    await snapshot.async_load()
 
-    template = Template(effective_template_str, hass)
-    track_template = TrackTemplate(template, None)
-
-    async def template_listener(event, updates):
-        if entry_id not in hass.data[DOMAIN]["entries"]:
-            _LOGGER.warning(f"Entry ID {entry_id} not found during template update.")
-            return
-        
-        for result in updates:
-            if result.result is not None:
-                # Check if result is an error message string containing template errors
-                result_str = str(result.result)
-                if any(error in result_str for error in ["TypeError:", "ValueError:", "NameError:", "AttributeError:"]):
-                    hass.data[DOMAIN]["entries"][entry_id]["value"] = 0
-                    _LOGGER.warning(f"Template error for Slave {slave_id} Reg {register_addr}: {result_str}. Using 0.")
-                else:
-                    entry_obj = hass.data[DOMAIN]["entries"][entry_id]
-                    entry_value_map = entry_obj.get("value_map")
-                    entry_scale = int(entry_obj.get("scale", 1) or 1)
-                    value = parse_template_result(result.result, entry_value_map, entry_scale)
-                    entry_obj["value"] = value
-                    _LOGGER.info(f"Updated Slave {slave_id} Reg {register_addr}: {value} (from '{result.result}', scale: {entry_scale})")
+    # One bus per serial port; entries on other ports get their own handler
+    bus = hass.data[DOMAIN]["buses"].get(serial_port)
+    if bus is None:
+        try:
+            if is_tcp_port(serial_port):
+                if realtime:
+                    _LOGGER.warning(f"Real-time I/O is only available on serial ports; {serial_port} runs on the event loop")
+                bus = ModbusTcpBus(serial_port, baudrate)
             else:
-                hass.data[DOMAIN]["entries"][entry_id]["value"] = 0  # Entity unavailable fallback
-                _LOGGER.warning(
-                    f"Template unavailable for Slave {slave_id} Reg {register_addr}. Defaulting to 0."
-                )
+                bus = ModbusBus(serial_port, baudrate, realtime)
+        except ValueError as e:
+            _LOGGER.error(f"Invalid port {serial_port}: {e}")
+            return False
+        hass.data[DOMAIN]["buses"][serial_port] = bus
+        snapshot.attach(bus)
+    elif bus.baudrate != baudrate:
+        _LOGGER.warning(f"Serial port {serial_port} already runs at {bus.baudrate} baud; ignoring {baudrate} from entry {entry_id}")
+    if realtime and not getattr(bus, "realtime", False) and not is_tcp_port(serial_port):
+        _LOGGER.warning(f"Serial port {serial_port} is already served from the event loop; ignoring the real-time option of entry {entry_id}")
+    bus.entry_ids.add(entry_id)
+    if bus.stats_entry_id is None:
+        bus.stats_entry_id = entry_id
 
-    template_unsubscribe = async_track_template_result(hass, [track_template], template_listener)
-    hass.data[DOMAIN]["entries"][entry_id]["template_tracker"] = template_unsubscribe
-    
-    # Get initial template value immediately
-    try:
-        initial_result = template.async_render()
-        if initial_result is not None:
-            # Check if result is an error message string containing template errors
-            result_str = str(initial_result)
-            if any(error in result_str for error in ["TypeError:", "ValueError:", "NameError:", "AttributeError:"]):
-                hass.data[DOMAIN]["entries"][entry_id]["value"] = 0
-                _LOGGER.warning(f"Initial template error for Slave {slave_id} Reg {register_addr}: {result_str}. Using 0.")
-            else:
-                value = parse_template_result(initial_result, value_map, scale)
-                hass.data[DOMAIN]["entries"][entry_id]["value"] = value
-                _LOGGER.info(f"Initial value for Slave {slave_id} Reg {register_addr}: {value} (from '{initial_result}', scale: {scale})")
-        else:
-            hass.data[DOMAIN]["entries"][entry_id]["value"] = 0
-            _LOGGER.warning(f"Initial template unavailable for Slave {slave_id} Reg {register_addr}. Using 0.")
-    except Exception as e:
-        hass.data[DOMAIN]["entries"][entry_id]["value"] = 0
-        _LOGGER.warning(f"Error evaluating initial template for Slave {slave_id} Reg {register_addr}: {e}. Using 0.")
+    if CONF_REGISTER_MAP in data:
+        _setup_register_map(hass, config_entry, bus)
+    else:
+        entry = hass.data[DOMAIN]["entries"][entry_id] = _make_entry(_entry_config(config_entry), bus)
+        # Index by slave/register so requests are a dict lookup; duplicates are reported here
+        bus.registers.add(entry_id, entry)
+        snapshot.restore(entry)
+        entry["tracker"] = _track_register_source(hass, entry_id)
+
+    # Master writes reach Home Assistant through the dispatcher's worker tasks
+    hass.data[DOMAIN]["writes"].start()
 
     # Initialize serial connection and background task
     try:
-        if hass.data[DOMAIN]["serial_connection"] is None:
-            def create_serial_connection():
-                return serial.Serial(
-                    port=hass.data[DOMAIN]["serial_port"],
-                    baudrate=hass.data[DOMAIN]["baudrate"],
-                    timeout=1,
-                    parity='N',
-                    stopbits=2,
-                    bytesize=8,
-                )
-
-            serial_conn = await hass.async_add_executor_job(create_serial_connection)
-            hass.data[DOMAIN]["serial_connection"] = serial_conn
-            _LOGGER.info(f"Opened serial port {hass.data[DOMAIN]['serial_port']} at {hass.data[DOMAIN]['baudrate']} baud")
-
-        # Start background handler if not already running
-        task = hass.data[DOMAIN].get("serial_task")
-        if task is None or task.done():
-            serial_conn = hass.data[DOMAIN]["serial_connection"]
-            # Prefer background task to avoid blocking startup
-            if hasattr(hass, "async_create_background_task"):
-                hass.data[DOMAIN]["serial_task"] = hass.async_create_background_task(
-                    modbus_slave_handler(hass, serial_conn), name="modbus_slave_handler"
-                )
-            else:
-                hass.data[DOMAIN]["serial_task"] = hass.async_create_task(
-                    modbus_slave_handler(hass, serial_conn)
-                )
-            _LOGGER.info("Started Modbus slave handler task")
+        await bus.async_open(hass)
+        if isinstance(bus, ModbusTcpBus):
+            handler = modbus_tcp_handler
         else:
-            _LOGGER.debug("Modbus slave handler already running; not starting another")
+            handler = modbus_realtime_handler if bus.realtime else modbus_slave_handler
+        bus.start(hass, handler)
     except Exception as e:
         _LOGGER.error(f"Failed to initialize Modbus slave: {e}")
         return False
+    if data.get(CONF_SERVE_TCP):
+        await _async_serve_tcp(hass, bus, data[CONF_SERVE_TCP], entry_id)
+
+    # Diagnostic sensors for the bus
+    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
     # Set up options update listener
     config_entry.async_on_unload(
@@ -187,6 +144,183 @@ async def async_setup_entry(hass, config_entry):
 
     return True
 
+async def _async_serve_tcp(hass, bus, url, entry_id):
+    """Let TCP masters at ``url`` read and write a serial bus's registers too."""
+    if isinstance(bus, ModbusTcpBus):
+        _LOGGER.warning(f"{bus.port} is already a TCP listener; ignoring the TCP listener {url} of entry {entry_id}")
+        return
+    if bus.tcp_listener is not None:
+        if bus.tcp_listener.port != url:
+            _LOGGER.warning(f"Serial port {bus.port} is already served on {bus.tcp_listener.port}; ignoring {url} from entry {entry_id}")
+        return
+    if url in hass.data[DOMAIN]["buses"]:
+        _LOGGER.error(f"{url} is already the port of other entries; not serving {bus.port} there")
+        return
+    try:
+        listener = ModbusTcpBus(url, bus.baudrate, bus)
+        await listener.async_open(hass)
+    except (ValueError, OSError) as e:
+        _LOGGER.error(f"Could not serve {bus.port} on {url}: {e}")
+        return
+    listener.start(hass, modbus_tcp_handler)
+    bus.tcp_listener = listener
+
+def _entry_config(config_entry) -> dict:
+    """A single-register entry's data with the options set since, the way option updates apply them."""
+    options = {key: value for key, value in config_entry.options.items() if value not in (None, "")}
+    return {**config_entry.data, **options}
+
+def _make_entry(data, bus, codec=None) -> dict:
+    """Runtime state of one register, from a config entry's data or a register map row."""
+    scale = int(data.get(CONF_SCALE, 1) or 1)
+    value_map = data.get(CONF_VALUE_MAP)
+    codec = codec or _make_codec(data, value_map, scale)
+    return {
+        "serial_port": bus.port,
+        "bus": bus,
+        "slave_id": data[CONF_SLAVE_ID],
+        "register_addr": data[CONF_REGISTER_ADDR],
+        "register_type": data.get(CONF_REGISTER_TYPE, REGISTER_HOLDING),
+        "value": 0,
+        "restored": False,  # value came from the snapshot and the source has not reported yet
+        "write_target": data.get("write_target"),
+        "tracker": None,
+        "value_map": value_map,
+        "codec": codec,
+        "limits": _make_limits(data, scale),
+        "settle_until": 0.0,  # loop time until which a value the master wrote holds off the source
+        "settle_timer": None,
+        "held": None,  # latest source value that arrived while settling
+        "dispatched": None,  # last value the master wrote that reached Home Assistant
+        "template": data.get(CONF_TEMPLATE, "{{ 0 }}"),
+        "template_str": None,  # effective template, only set for template-backed registers
+        # New flexible configuration
+        "direction": data.get(CONF_DIRECTION, 'read_write'),
+        "scale": scale,
+        "read_mode": data.get(CONF_READ_MODE, 'template'),
+        "read_entity": data.get(CONF_READ_ENTITY),
+        "read_attribute": data.get(CONF_READ_ATTRIBUTE),
+        "write_service": data.get(CONF_WRITE_SERVICE),
+        "write_entity": data.get(CONF_WRITE_ENTITY),
+        "write_payload": data.get(CONF_WRITE_PAYLOAD),
+        "unmapped_policy": data.get(CONF_UNMAPPED_POLICY, UNMAPPED_ZERO_FILL),
+    }
+
+def _setup_register_map(hass: HomeAssistant, config_entry, bus):
+    """Compile every row of a register map entry into the bus's register image in one pass.
+
+    Each row gets the same runtime state as a single-register entry, stored
+    under ``<entry_id>:<row>``. Rows with the same conversion settings share
+    a codec, all entity-backed rows share one state-change subscription, and
+    template rows join the shared template tracker.
+    """
+    entry_id = config_entry.entry_id
+    entries = hass.data[DOMAIN]["entries"]
+    snapshot = hass.data[DOMAIN]["snapshot"]
+    options = config_entry.options
+    rows = options.get(CONF_REGISTER_MAP) or config_entry.data[CONF_REGISTER_MAP]
+    unmapped_policy = options.get(CONF_UNMAPPED_POLICY) or config_entry.data.get(CONF_UNMAPPED_POLICY, UNMAPPED_ZERO_FILL)
+
+    codecs = {}
+    keys = []
+    by_entity = {}
+    template_keys = []
+    for number, row in enumerate(rows):
+        codec_key = (
+            json.dumps(row.get(CONF_VALUE_MAP) or {}, sort_keys=True),
+            row.get(CONF_SCALE), row.get(CONF_DATA_TYPE), row.get(CONF_WORD_ORDER), row.get(CONF_BYTE_ORDER),
+        )
+        key = f"{entry_id}:{number}"
+        entry = entries[key] = _make_entry({**row, CONF_UNMAPPED_POLICY: unmapped_policy}, bus, codecs.get(codec_key))
+        codecs[codec_key] = entry["codec"]
+        bus.registers.add(key, entry)
+        snapshot.restore(entry)
+        keys.append(key)
+        if entry["read_entity"]:
+            by_entity.setdefault(entry["read_entity"], []).append(entry)
+            _apply_state(hass, entry, hass.states.get(entry["read_entity"]))
+        elif entry["template"]:
+            _track_template(hass, key)
+            template_keys.append(key)
+
+    @callback
+    def state_listener(event):
+        new_state = event.data.get("new_state")
+        for entry in by_entity.get(event.data["entity_id"], ()):
+            _apply_state(hass, entry, new_state)
+
+    unsubscribe = async_track_state_change_event(hass, list(by_entity), state_listener) if by_entity else None
+
+    def stop():
+        if unsubscribe is not None:
+            unsubscribe()
+        templates = hass.data[DOMAIN]["templates"]
+        for key in template_keys:
+            templates.remove(key)
+
+    entries[entry_id] = {"serial_port": bus.port, "bus": bus, "register_map": keys, "tracker": stop}
+    _LOGGER.info(
+        f"Loaded register map with {len(keys)} register(s) on {bus.port}: "
+        f"{len(by_entity)} source entities, {len(template_keys)} templates"
+    )
+
+def _make_codec(data, value_map, scale) -> RegisterCodec:
+    """Codec for an entry; the data type and its byte/word order are fixed at setup."""
+    return RegisterCodec(
+        value_map,
+        scale,
+        data.get(CONF_DATA_TYPE, DEFAULT_DATA_TYPE),
+        data.get(CONF_WORD_ORDER, 'big'),
+        data.get(CONF_BYTE_ORDER, 'big'),
+    )
+
+def _make_limits(data, scale) -> UpdateLimits | None:
+    """Deadband and rate limits for an entry, or None when it has none."""
+    deadband = float(data.get(CONF_DEADBAND) or 0)
+    deadband_percent = float(data.get(CONF_DEADBAND_PERCENT) or 0)
+    min_interval = float(data.get(CONF_MIN_INTERVAL) or 0)
+    max_staleness = float(data.get(CONF_MAX_STALENESS) or 0)
+    if not (deadband or deadband_percent or min_interval or max_staleness):
+        return None
+    return UpdateLimits(deadband, deadband_percent, min_interval, max_staleness, scale if scale > 1 else 1)
+
+def _update_register(hass: HomeAssistant, entry: dict, value, force=False) -> bool:
+    """Write a value from the entry's source to its register, subject to its limits; return True if written now.
+
+    A value equal to the register's is never written, so the image and the
+    cached replies covering it stay as they are. ``force`` skips the
+    deadband and rate limits, for fallbacks that must not be held back.
+    Right after a master write the value is held until the write has
+    settled (see ``_store_master_write``).
+    """
+    if entry["settle_until"]:
+        if hass.loop.time() < entry["settle_until"]:
+            entry["held"] = value
+            if entry["settle_timer"] is None:
+                entry["settle_timer"] = hass.loop.call_at(entry["settle_until"], _settled, hass, entry)
+            return False
+        entry["settle_until"] = 0.0
+    limits = entry["limits"]
+    if limits is None:
+        if value == entry["value"]:
+            return False
+        entry["bus"].registers.set_value(entry, value)
+        return True
+    return limits.offer(hass, entry, value, force)
+
+@callback
+def _settled(hass: HomeAssistant, entry: dict):
+    """Apply the last source value held back while a master write settled."""
+    entry["settle_timer"] = None
+    if hass.loop.time() < entry["settle_until"]:
+        # The master wrote again meanwhile
+        entry["settle_timer"] = hass.loop.call_at(entry["settle_until"], _settled, hass, entry)
+        return
+    entry["settle_until"] = 0.0
+    value, entry["held"] = entry["held"], None
+    if value is not None and _update_register(hass, entry, value):
+        entry["bus"].traffic.record(entry["slave_id"], HA_UPDATE, entry["register_addr"])
+
 async def async_update_options(hass: HomeAssistant, config_entry: config_entries.ConfigEntry):
     """Handle options update."""
     entry_id = config_entry.entry_id
@@ -194,6 +328,10 @@ async def async_update_options(hass: HomeAssistant, config_entry: config_entries
     if entry_id not in hass.data[DOMAIN]["entries"]:
         _LOGGER.warning(f"Entry {entry_id} not found for options update")
         return
+    if "register_map" in hass.data[DOMAIN]["entries"][entry_id]:
+        # A new table is compiled from scratch, like at startup
+        await hass.config_entries.async_reload(entry_id)
+        return
     
     # Get new options
     template_str = config_entry.options.get(CONF_TEMPLATE) or config_entry.data.get(CONF_TEMPLATE)
@@ -208,14 +346,17 @@ async def async_update_options(hass: HomeAssistant, config_entry: config_entries
     write_service = config_entry.options.get(CONF_WRITE_SERVICE) or config_entry.data.get(CONF_WRITE_SERVICE)
     write_entity = config_entry.options.get(CONF_WRITE_ENTITY) or config_entry.data.get(CONF_WRITE_ENTITY)
     write_payload = config_entry.options.get(CONF_WRITE_PAYLOAD) or config_entry.data.get(CONF_WRITE_PAYLOAD)
+    unmapped_policy = config_entry.options.get(CONF_UNMAPPED_POLICY) or config_entry.data.get(CONF_UNMAPPED_POLICY, UNMAPPED_ZERO_FILL)
     
     entry_data = hass.data[DOMAIN]["entries"][entry_id]
     slave_id = entry_data["slave_id"]
     register_addr = entry_data["register_addr"]
     
-    # Stop old template tracker
-    if entry_data["template_tracker"] and callable(entry_data["template_tracker"]):
-        entry_data["template_tracker"]()
+    # Stop old tracker
+    if entry_data["tracker"] and callable(entry_data["tracker"]):
+        entry_data["tracker"]()
+    if entry_data["limits"] is not None:
+        entry_data["limits"].cancel()
     
     # Update new settings
     entry_data["write_target"] = write_target
@@ -225,137 +366,157 @@ async def async_update_options(hass: HomeAssistant, config_entry: config_entries
     entry_data["read_entity"] = read_entity
     entry_data["read_attribute"] = read_attribute
     entry_data["scale"] = scale
+    entry_data["codec"] = _make_codec(config_entry.data, value_map, scale)
+    entry_data["limits"] = _make_limits(_entry_config(config_entry), scale)
+    entry_data["template"] = template_str
     entry_data["write_service"] = write_service
     entry_data["write_entity"] = write_entity
     entry_data["write_payload"] = write_payload
+    entry_data["unmapped_policy"] = unmapped_policy
+    entry_data["bus"].registers.add(entry_id, entry_data)
+
+    # Start new tracker; this also loads the current value
+    entry_data["tracker"] = _track_register_source(hass, entry_id)
     
-    # Create new template and tracker
-    # Build effective template string from config
-    effective_template_str = template_str or "{{ 0 }}"
-    if (read_mode == 'entity' or read_entity) and read_entity:
-        if read_attribute:
-            effective_template_str = f"{{{{ state_attr('{read_entity}', '{read_attribute}') }}}}"
-        else:
-            effective_template_str = f"{{{{ states('{read_entity}') }}}}"
-    entry_data["template_str"] = effective_template_str
+    _LOGGER.info(f"Updated options for Slave {slave_id} Reg {register_addr}")
 
-    template = Template(effective_template_str, hass)
-    track_template = TrackTemplate(template, None)
+def _track_register_source(hass: HomeAssistant, entry_id: str):
+    """Keep the register of ``entry_id`` in sync with its source; return the unsubscribe callable.
+
+    Registers backed by an entity (and optional attribute) listen to that
+    entity's state changes and read the State object directly. Only custom
+    templates go through the template engine.
+    """
+    entry = hass.data[DOMAIN]["entries"][entry_id]
+    read_entity = entry.get("read_entity")
+    if not read_entity:
+        return _track_template(hass, entry_id)
 
-    async def template_listener(event, updates):
-        if entry_id not in hass.data[DOMAIN]["entries"]:
-            _LOGGER.warning(f"Entry ID {entry_id} not found during template update.")
+    @callback
+    def state_listener(event):
+        entry_obj = hass.data[DOMAIN]["entries"].get(entry_id)
+        if entry_obj is None:
+            _LOGGER.warning("Entry ID %s not found during state update.", entry_id)
             return
-        
-        for result in updates:
-            if result.result is not None:
-                # Check if result is an error message string containing template errors
-                result_str = str(result.result)
-                if any(error in result_str for error in ["TypeError:", "ValueError:", "NameError:", "AttributeError:"]):
-                    hass.data[DOMAIN]["entries"][entry_id]["value"] = 0
-                    _LOGGER.warning(f"Template error for Slave {slave_id} Reg {register_addr}: {result_str}. Using 0.")
-                else:
-                    entry_value_map = hass.data[DOMAIN]["entries"][entry_id].get("value_map")
-                    entry_scale = int(hass.data[DOMAIN]["entries"][entry_id].get("scale", 1) or 1)
-                    value = parse_template_result(result.result, entry_value_map, entry_scale)
-                    hass.data[DOMAIN]["entries"][entry_id]["value"] = value
-                    _LOGGER.info(f"Updated Slave {slave_id} Reg {register_addr}: {value} (from '{result.result}', scale: {entry_scale})")
-            else:
-                hass.data[DOMAIN]["entries"][entry_id]["value"] = 0
-                _LOGGER.warning(
-                    f"Template unavailable for Slave {slave_id} Reg {register_addr}. Defaulting to 0."
-                )
-
-    # Start new template tracker
-    template_unsubscribe = async_track_template_result(hass, [track_template], template_listener)
-    entry_data["template_tracker"] = template_unsubscribe
+        _apply_state(hass, entry_obj, event.data.get("new_state"))
+
+    unsubscribe = async_track_state_change_event(hass, [read_entity], state_listener)
+    _apply_state(hass, entry, hass.states.get(read_entity))
+    return unsubscribe
+
+@callback
+def _apply_state(hass: HomeAssistant, entry: dict, state):
+    """Encode the entity state, or the configured attribute, into the entry's register.
+
+    The register is only written when the encoded value changes, and within
+    the entry's deadband and rate limits.
+    """
+    attribute = entry.get("read_attribute")
+    if state is None:
+        # What states()/state_attr() give for an entity that does not exist
+        raw = None if attribute else 'unknown'
+    elif attribute:
+        raw = state.attributes.get(attribute)
+    else:
+        raw = state.state
+
+    if entry["restored"] and _keep_restored(entry, raw):
+        return
+    if raw is None:
+        value = 0  # Entity or attribute unavailable fallback
+    else:
+        value = entry["codec"].encode(raw)
+    if not _update_register(hass, entry, value, force=raw is None):
+        return
+    if raw is None:
+        _LOGGER.warning("Source unavailable for Slave %s Reg %s. Defaulting to 0.", entry["slave_id"], entry["register_addr"])
+    elif _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Updated Slave %s Reg %s: %s (from '%s', scale: %s)", entry["slave_id"], entry["register_addr"], value, raw, entry["codec"].scale)
+    entry["bus"].traffic.record(entry["slave_id"], HA_UPDATE, entry["register_addr"])
+
+_UNRESOLVED = (None, 'unknown', 'unavailable')
+
+def _keep_restored(entry, raw) -> bool:
+    """Whether ``raw`` leaves the snapshot value of ``entry`` in place.
+
+    A restored value stands until the source first reports something real,
+    so a source that is still unavailable at startup does not zero its
+    register; after that, unavailable maps to 0 as usual.
+    """
+    if raw in _UNRESOLVED:
+        return True
+    entry["restored"] = False
+    return False
+
+def _track_template(hass: HomeAssistant, entry_id: str):
+    """Track a custom template register on the shared tracker; return the unsubscribe callable."""
+    entry = hass.data[DOMAIN]["entries"][entry_id]
+    slave_id = entry["slave_id"]
+    register_addr = entry["register_addr"]
+    effective_template_str = entry.get("template") or "{{ 0 }}"
+    entry["template_str"] = effective_template_str
+
+    template = Template(effective_template_str, hass)
+    templates = hass.data[DOMAIN]["templates"]
+    limits = entry["limits"]
+    rate_limit = timedelta(seconds=limits.min_interval) if limits is not None and limits.min_interval else None
+    templates.add(entry_id, template, rate_limit)
     
-    # Get initial template value immediately after options update
+    # Get initial template value immediately
     try:
         initial_result = template.async_render()
-        if initial_result is not None:
+        if entry["restored"] and _keep_restored(entry, initial_result):
+            _LOGGER.debug("Template for Slave %s Reg %s not resolved yet; keeping %s from the snapshot", slave_id, register_addr, entry["value"])
+        elif initial_result is not None:
             # Check if result is an error message string containing template errors
             result_str = str(initial_result)
             if any(error in result_str for error in ["TypeError:", "ValueError:", "NameError:", "AttributeError:"]):
-                entry_data["value"] = 0
+                _update_register(hass, entry, 0, force=True)
                 _LOGGER.warning(f"Initial template error for Slave {slave_id} Reg {register_addr}: {result_str}. Using 0.")
             else:
-                value = parse_template_result(initial_result, value_map, scale)
-                entry_data["value"] = value
-                _LOGGER.info(f"Initial value after options update for Slave {slave_id} Reg {register_addr}: {value} (from '{initial_result}', scale: {scale})")
+                value = entry["codec"].encode(initial_result)
+                _update_register(hass, entry, value, force=True)
+                _LOGGER.debug("Initial value for Slave %s Reg %s: %s (from '%s', scale: %s)", slave_id, register_addr, value, initial_result, entry["codec"].scale)
         else:
-            entry_data["value"] = 0
+            _update_register(hass, entry, 0, force=True)
             _LOGGER.warning(f"Initial template unavailable for Slave {slave_id} Reg {register_addr}. Using 0.")
     except Exception as e:
-        entry_data["value"] = 0
+        _update_register(hass, entry, 0, force=True)
         _LOGGER.warning(f"Error evaluating initial template for Slave {slave_id} Reg {register_addr}: {e}. Using 0.")
-    
-    _LOGGER.info(f"Updated options for Slave {slave_id} Reg {register_addr}")
 
-def parse_template_result(result_value, value_map=None, scale: int = 1):
-    """Parse template result into register numeric value.
+    return lambda: templates.remove(entry_id)
 
-    Behavior:
-    - If result is numeric: apply scale (multiply) and return int(round(...)).
-    - Else if mapping provided: map string to int without scaling.
-    - Else try built-in mappings; otherwise 0.
-    """
-    if result_value is None:
-        return 0
-        
-    result_str = str(result_value).strip()
-    _LOGGER.debug(f"Parsing template result: '{result_str}' with value_map: {value_map}, scale: {scale}")
-    
-    # First try direct numeric conversion
-    try:
-        numeric = float(result_str)
-        numeric_scaled = int(round(numeric * (scale if scale and scale > 1 else 1)))
-        _LOGGER.debug(f"Direct numeric conversion successful: {numeric} -> scaled: {numeric_scaled}")
-        return numeric_scaled
-    except (ValueError, TypeError):
-        pass
-    
-    # If value_map is provided, try to map string values
-    if value_map and isinstance(value_map, dict):
-        _LOGGER.debug(f"Checking custom value_map for '{result_str}'")
-        # Try case-insensitive lookup
-        for key, value in value_map.items():
-            if str(key).lower() == result_str.lower():
-                try:
-                    mapped_result = int(float(value))
-                    _LOGGER.debug(f"Custom mapping found: '{key}' -> {mapped_result}")
-                    return mapped_result
-                except (ValueError, TypeError):
-                    _LOGGER.warning(f"Value map contains non-numeric value: {key} -> {value}")
-                    continue
-    
-    # If no mapping found, try some common HVAC state mappings
-    _LOGGER.debug(f"No custom mapping found, checking built-in mappings for '{result_str}'")
-    common_mappings = {
-        'off': 0,
-        'heat': 1,
-        'cool': 2,
-        'auto': 3,
-        'dry': 4,
-        'fan_only': 5,
-        'idle': 0,
-        'heating': 1,
-        'cooling': 2,
-        'false': 0,
-        'true': 1,
-        'on': 1,
-        'unknown': 0,
-        'unavailable': 0
-    }
-    
-    mapped_value = common_mappings.get(result_str.lower())
-    if mapped_value is not None:
-        _LOGGER.debug(f"Built-in mapping found: '{result_str}' -> {mapped_value}")
-        return mapped_value
-    
-    # Last resort: return 0
-    _LOGGER.warning(f"Could not convert template result '{result_value}' to numeric value, using 0")
-    return 0
+def _make_template_result_handler(hass: HomeAssistant):
+    """Build the callback that applies shared-tracker results to their registers."""
+
+    @callback
+    def template_result(entry_id, result):
+        entry_obj = hass.data[DOMAIN]["entries"].get(entry_id)
+        if entry_obj is None:
+            _LOGGER.warning("Entry ID %s not found during template update.", entry_id)
+            return
+        if entry_obj["restored"] and _keep_restored(entry_obj, result):
+            return
+        slave_id = entry_obj["slave_id"]
+        register_addr = entry_obj["register_addr"]
+        if result is not None:
+            # Check if result is an error message string containing template errors
+            result_str = str(result)
+            if any(error in result_str for error in ["TypeError:", "ValueError:", "NameError:", "AttributeError:"]):
+                written = _update_register(hass, entry_obj, 0, force=True)
+                _LOGGER.warning("Template error for Slave %s Reg %s: %s. Using 0.", slave_id, register_addr, result_str)
+            else:
+                value = entry_obj["codec"].encode(result)
+                written = _update_register(hass, entry_obj, value)
+                if written and _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("Updated Slave %s Reg %s: %s (from '%s', scale: %s)", slave_id, register_addr, value, result, entry_obj["codec"].scale)
+        else:
+            written = _update_register(hass, entry_obj, 0, force=True)  # Entity unavailable fallback
+            _LOGGER.warning("Template unavailable for Slave %s Reg %s. Defaulting to 0.", slave_id, register_addr)
+        if written:
+            entry_obj["bus"].traffic.record(slave_id, HA_UPDATE, register_addr)
+
+    return template_result
 
 def detect_template_scaling(template_str):
     """Detect scaling factor from template string (e.g., * 10, * 100)."""
@@ -366,215 +527,519 @@ def detect_template_scaling(template_str):
         return int(match.group(1))
     return None
 
-def reverse_value_mapping(numeric_value, value_map=None, scaling_factor=None):
-    """Convert numeric value back to string using reverse mapping and scaling."""
-    # Apply reverse scaling if detected
-    if scaling_factor and scaling_factor > 1:
-        numeric_value = numeric_value / scaling_factor
-        _LOGGER.debug(f"Applied reverse scaling: {numeric_value * scaling_factor} / {scaling_factor} = {numeric_value}")
-    
-    # If value_map is provided, try reverse lookup
-    if value_map and isinstance(value_map, dict):
-        for key, value in value_map.items():
-            try:
-                if int(float(value)) == int(numeric_value):
-                    return str(key)
-            except (ValueError, TypeError):
-                continue
-    
-    # Use common HVAC state mappings for reverse lookup
-    common_reverse_mappings = {
-        0: 'off',
-        1: 'heat', 
-        2: 'cool',
-        3: 'auto',
-        4: 'dry',
-        5: 'fan_only'
-    }
-    
-    # For scaled values, return as float string if it has decimals
-    if scaling_factor and scaling_factor > 1:
-        if numeric_value != int(numeric_value):
-            return str(numeric_value)
-        else:
-            return str(int(numeric_value))
-    
-    return common_reverse_mappings.get(int(numeric_value), str(int(numeric_value)))
-
-def calc_crc(data):
-    """Calculate Modbus RTU CRC16."""
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            crc = (crc >> 1) ^ (0xA001 if crc & 1 else 0)
-    return crc.to_bytes(2, 'little')
-
-def read_serial_data(serial_conn):
-    """Read data from serial port (blocking operation for executor)."""
-    try:
-        # Check if data is available before reading
-        if serial_conn.in_waiting > 0:
-            data = serial_conn.read(1)
-            return data if data else b''
-        else:
-            return b''
-    except Exception as e:
-        # Log the specific error but don't re-raise to avoid spam
-        _LOGGER.debug(f"Serial read error: {e}")
-        return b''
-
-def write_serial_data(serial_conn, data):
-    """Write data to serial port (blocking operation for executor)."""
-    return serial_conn.write(data)
+async def modbus_slave_handler(hass: HomeAssistant, bus: ModbusBus):
+    """Handle Modbus slave communication on one bus using HA async patterns."""
+    stream = SerialStream(bus.serial_connection)
+    framer = RtuFramer(bus.baudrate)
+    # Frames for slaves without registers on this bus are dropped inside the framer
+    framer.slave_ids = bus.registers.slave_ids
+    loop = asyncio.get_running_loop()
 
-async def modbus_slave_handler(hass: HomeAssistant, serial_conn):
-    """Handle Modbus slave communication using HA async patterns."""
-    buffer = b''
-    
     try:
         while True:
             try:
-                # Read byte using executor to avoid blocking event loop
-                byte = await hass.async_add_executor_job(read_serial_data, serial_conn)
-                if not byte:
-                    # Brief pause when no data available to prevent busy waiting
-                    await asyncio.sleep(0.01)
-                    continue
-                
-                buffer += byte
-
-                if len(buffer) >= 8:
-                    req_slave, func, addr_hi, addr_lo, val_hi, val_lo, crc_lo, crc_hi = buffer[:8]
-                    addr = (addr_hi << 8) | addr_lo
-                    value_received = (val_hi << 8) | val_lo
-                    crc_received = buffer[6:8]
-                    crc_calculated = calc_crc(buffer[:6])
-
-                    if crc_received != crc_calculated:
-                        buffer = buffer[1:]
-                        continue
-
-                    matched_entries = []
-                    for entry_id, entry in hass.data[DOMAIN]["entries"].items():
-                        if entry["slave_id"] == req_slave and entry["register_addr"] == addr:
-                            matched_entries.append((entry_id, entry))
-                    
-                    if len(matched_entries) > 1:
-                        _LOGGER.warning(f"Found {len(matched_entries)} duplicate entries for Slave {req_slave} Reg {addr}: {[eid for eid, _ in matched_entries]}")
-                    
-                    matched_entry = matched_entries[0][1] if matched_entries else None
-
-                    if matched_entry:
-                        if func == 3:  # Read Holding Register
-                            value = matched_entry["value"]
-                            payload = struct.pack('>h', value)
-                            response = bytes([req_slave, 3, 2]) + payload
-                            crc_resp = calc_crc(response)
-                            await hass.async_add_executor_job(write_serial_data, serial_conn, response + crc_resp)
-                            _LOGGER.info(f"Sent {value} to Slave {req_slave} Reg {addr}")
-
-                        elif func == 6:  # Write Single Register
-                            matched_entry["value"] = value_received
-                            response = buffer[:6] + crc_calculated
-                            await hass.async_add_executor_job(write_serial_data, serial_conn, response)
-                            _LOGGER.info(f"Received {value_received} from Master (Slave {req_slave} Reg {addr})")
-
-                            # Respect direction: only act on writes if allowed
-                            direction = matched_entry.get("direction", 'read_write')
-                            if direction in ('write_only', 'read_write', 'write_read'):
-                                # Prefer configured service if present
-                                write_service = matched_entry.get("write_service")
-                                if write_service:
-                                    try:
-                                        value_map = matched_entry.get("value_map")
-                                        scale = int(matched_entry.get("scale", 1) or 1)
-                                        value_scaled = float(value_received) / float(scale) if scale and scale > 1 else float(value_received)
-                                        mapped_value = reverse_value_mapping(value_received, value_map, scale)
-                                        variables = {
-                                            'value': value_received,
-                                            'value_scaled': value_scaled,
-                                            'mapped_value': mapped_value,
-                                        }
-                                        entity = matched_entry.get("write_entity") or matched_entry.get("read_entity")
-                                        payload_tmpl = matched_entry.get("write_payload")
-                                        await _call_configured_service(hass, write_service, entity, payload_tmpl, variables)
-                                    except Exception as e:
-                                        _LOGGER.error(f"Error calling configured service '{write_service}': {e}")
-                                else:
-                                    # Fallback to legacy write_target behavior
-                                    write_target = matched_entry.get("write_target")
-                                    if write_target:
-                                        value_map = matched_entry.get("value_map")
-                                        scale = int(matched_entry.get("scale", 1) or 1)
-                                        await _update_entity_attribute(hass, write_target, value_received, value_map, scale)
-
-                    buffer = b''  # reset buffer after processing
-                    
+                # Wait on the event loop until the port has data; takes every ready byte at once.
+                # While a frame is half received, wake up after the inter-frame silence to close it.
+                data = await stream.read(framer.gap if framer.pending else None)
+                now = stream.last_rx_time if data else loop.time()
+                for frame in framer.feed(data, now):
+                    response = _answer_rtu_frame(hass, bus, frame, stream.last_rx_time)
+                    if response is not None:
+                        # The stream sends straight from the buffer; no executor hop
+                        stream.write(response)
+                if framer.crc_errors:
+                    bus.stats.crc_errors += framer.crc_errors
+                    framer.crc_errors = 0
+                if framer.other_slaves:
+                    bus.stats.record_other_slaves(framer.other_slaves)
+                    framer.other_slaves = {}
+
             except asyncio.CancelledError:
                 _LOGGER.info("Modbus slave handler cancelled")
                 break
             except Exception as e:
                 _LOGGER.error(f"Error in Modbus slave handler: {e}")
+                framer.reset()
                 await asyncio.sleep(1)  # Brief pause before retrying
                 
     finally:
-        # Clean up serial connection
-        if serial_conn.is_open:
-            await hass.async_add_executor_job(serial_conn.close)
-        _LOGGER.info("Modbus slave handler stopped")
+        # The bus closes the serial connection itself
+        stream.close()
+        _LOGGER.info(f"Modbus slave handler for {bus.port} stopped")
+
+# Seconds between moving the I/O thread's counters into the bus stats
+REALTIME_DRAIN_INTERVAL = 1
 
-async def _call_configured_service(hass: HomeAssistant, domain_service: str, entity: str | None, payload_template: str | None, variables: dict):
-    """Call a HA service given as 'domain.service', rendering a JSON payload template.
+async def modbus_realtime_handler(hass: HomeAssistant, bus: ModbusBus):
+    """Serve one bus from a dedicated I/O thread, for masters with a tight reply timeout.
+
+    The thread answers reads from the register images by itself; every
+    other request is handed to this loop, processed like on the default
+    handler, and the reply is sent back through the thread.
+    """
+    def answer_read(request, out):
+        # Reads neither touch hass nor change anything, so this is safe in the thread
+        return _process_request(hass, bus.registers, request, out, 0)
+
+    @callback
+    def hand_over(frame, received):
+        response = _answer_rtu_frame(hass, bus, frame, received)
+        if response is not None:
+            responder.send(bytes(response))
+
+    responder = RealtimeResponder(bus, answer_read, hand_over, asyncio.get_running_loop())
+    responder.start()
+    try:
+        while True:
+            await asyncio.sleep(REALTIME_DRAIN_INTERVAL)
+            responder.drain()
+    finally:
+        await hass.async_add_executor_job(responder.stop)
+        responder.drain()
+
+async def modbus_tcp_handler(hass: HomeAssistant, bus: ModbusTcpBus, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve one master connection on a Modbus TCP or RTU-over-TCP bus.
+
+    Every request parsed from a read is answered before the next read, and
+    replies are flushed together, so a master may pipeline requests.
+    """
+    rtu = bus.framing == FRAMING_RTU_OVER_TCP
+    if rtu:
+        framer = RtuFramer(bus.baudrate, TCP_GAP_TOLERANCE)
+        framer.slave_ids = bus.registers.slave_ids
+    else:
+        framer = MbapFramer()
+    out = bus.response
+    cache = bus.registers.cache
+    traffic = bus.traffic
+    stats = bus.stats
+    loop = asyncio.get_running_loop()
+
+    try:
+        while True:
+            if rtu:
+                try:
+                    data = await asyncio.wait_for(reader.read(4096), framer.gap if framer.pending else None)
+                except asyncio.TimeoutError:
+                    data = b''
+                if not data and reader.at_eof():
+                    break
+                received = loop.time()
+                for frame in framer.feed(data, received):
+                    response = _answer_rtu_frame(hass, bus, frame, received)
+                    if response is not None:
+                        # Copied: the transport may keep what it cannot send yet
+                        writer.write(bytes(response))
+                if framer.crc_errors:
+                    stats.crc_errors += framer.crc_errors
+                    framer.crc_errors = 0
+                if framer.other_slaves:
+                    stats.record_other_slaves(framer.other_slaves)
+                    framer.other_slaves = {}
+            else:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                received = loop.time()
+                for transaction_id, request in framer.feed(data):
+                    traffic.record_request(request)
+                    # MBAP replies are cached without their header, which carries the transaction id
+                    cacheable = request[1] not in WRITE_FUNCTIONS
+                    response = cache.get(request) if cacheable else None
+                    if response is not None:
+                        length = len(response)
+                        out[6:6 + length] = response
+                    else:
+                        length = _process_request(hass, bus.registers, request, out, 6)
+                        if length and cacheable:
+                            cache.put(request, bytes(out[6:6 + length]))
+                    if length:
+                        writer.write(out[:MbapFramer.build(out, transaction_id, length)])
+                        stats.record(request[0], request[1], out[7], loop.time() - received, out[8])
+                    else:
+                        stats.record(request[0], request[1], None, 0)
+            await writer.drain()
+    except (ConnectionError, ValueError) as e:
+        _LOGGER.warning(f"Closing Modbus connection on {bus.port}: {e}")
+
+def _answer_rtu_frame(hass: HomeAssistant, bus, frame: bytes, received: float):
+    """Build the reply to one CRC-checked RTU frame, or return None if it gets none.
+
+    Read replies come from the bus's response cache when possible; anything
+    else is a view of ``bus.response``, valid until the next frame.
+    ``received`` is the loop time the frame arrived, for the latency stats.
+    """
+    bus.traffic.record_request(frame)
+    cache = bus.registers.cache
+    # Reads and exception replies to anything but a write only change with the registers
+    cacheable = frame[1] not in WRITE_FUNCTIONS
+    response = cache.get(frame) if cacheable else None
+    if response is None:
+        out = bus.response
+        length = _process_request(hass, bus.registers, frame[:-2], out, 0)
+        if not length:
+            bus.stats.record(frame[0], frame[1], None, 0)
+            return None
+        length = append_crc(out, length)
+        if cacheable:
+            cache.put(frame, bytes(out[:length]))
+        response = memoryview(out)[:length]
+    bus.stats.record(frame[0], frame[1], response[1], asyncio.get_running_loop().time() - received, response[2])
+    return response
+
+_pack_reply_header = struct.Struct('>BBB').pack_into
+
+# Modbus exception codes
+ILLEGAL_FUNCTION = 1
+ILLEGAL_DATA_ADDRESS = 2
+ILLEGAL_DATA_VALUE = 3
+SLAVE_DEVICE_BUSY = 6
+
+# Requests with side effects; their replies are never served from the response cache
+WRITE_FUNCTIONS = frozenset((5, 6, 15, 16))
+# Seconds a value written by the master holds its register against updates from
+# Home Assistant, so the intermediate states of the entity it changes do not echo back
+WRITE_SETTLE_TIME = 2.0
+
+def _process_request(hass: HomeAssistant, registers, request: bytes, out: bytearray, offset: int) -> int:
+    """Answer one request from a master, given as slave id + PDU without any CRC.
+
+    Shared by the serial and TCP handlers. The response, in the same layout,
+    is written into ``out`` at ``offset`` so the caller can frame it in
+    place; returns its length, or 0 when the request gets no reply.
+
+    Requests for slave IDs without registers are ignored. Anything else gets
+    a reply, if need be an exception, so the master never has to time out.
+    """
+    if len(request) < 2:
+        return 0
+    req_slave = request[0]
+    func = request[1]
+    if req_slave not in registers.slave_ids:
+        return 0
+
+    if func in (3, 4):  # Read Holding / Input Registers, both served from the register image
+        if len(request) != 6:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        addr, quantity = _unpack_addr_value(request, 2)
+        if not 1 <= quantity <= MAX_READ_REGISTERS:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        if addr + quantity > 65536 or not registers.read_into(req_slave, addr, quantity, out, offset + 3):
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        _pack_reply_header(out, offset, req_slave, func, 2 * quantity)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Sent %d register(s) to Slave %d Reg %d", quantity, req_slave, addr)
+        return 3 + 2 * quantity
+
+    if func in (1, 2):  # Read Coils / Discrete Inputs, from the bit-packed images
+        if len(request) != 6:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        addr, quantity = _unpack_addr_value(request, 2)
+        if not 1 <= quantity <= MAX_READ_BITS:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        table = REGISTER_COIL if func == 1 else REGISTER_DISCRETE_INPUT
+        if addr + quantity > 65536 or not registers.read_bits_into(req_slave, table, addr, quantity, out, offset + 3):
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        byte_count = (quantity + 7) >> 3
+        _pack_reply_header(out, offset, req_slave, func, byte_count)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Sent %d bit(s) to Slave %d Reg %d", quantity, req_slave, addr)
+        return 3 + byte_count
+
+    if func == 15:  # Write Multiple Coils
+        if len(request) < 7:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        addr, quantity = _unpack_addr_value(request, 2)
+        byte_count = request[6]
+        if not 1 <= quantity <= MAX_WRITE_BITS or byte_count != (quantity + 7) >> 3 or len(request) != 7 + byte_count:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        if addr + quantity > 65536:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        entries = [registers.get(req_slave, addr + i, REGISTER_COIL) for i in range(quantity)]
+        missing = entries.count(None)
+        if missing == quantity or (missing and registers.unmapped_policy(req_slave) == UNMAPPED_EXCEPTION):
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        bits = int.from_bytes(request[7:], 'little')
+        received = [(entry, (bits >> i) & 1) for i, entry in enumerate(entries) if entry is not None]
+        if not hass.data[DOMAIN]["writes"].submit([write for write in received if _has_write_action(write[0])]):
+            return _busy_response(out, offset, req_slave, func)
+        settle_until = hass.loop.time() + WRITE_SETTLE_TIME
+        for entry, value in received:
+            _store_master_write(registers, entry, value, settle_until)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Received %d coil(s) from Master (Slave %d Reg %d)", quantity, req_slave, addr)
+        out[offset:offset + 6] = request[:6]
+        return 6
+
+    if func == 5:  # Write Single Coil
+        if len(request) != 6:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        addr, value_received = _unpack_addr_value(request, 2)
+        if value_received not in (0xFF00, 0x0000):
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        matched_entry = registers.get(req_slave, addr, REGISTER_COIL)
+        if matched_entry is None:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        state = 1 if value_received else 0
+        if _has_write_action(matched_entry) and not hass.data[DOMAIN]["writes"].submit([(matched_entry, state)]):
+            return _busy_response(out, offset, req_slave, func)
+        _store_master_write(registers, matched_entry, state, hass.loop.time() + WRITE_SETTLE_TIME)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Received coil %d from Master (Slave %d Reg %d)", state, req_slave, addr)
+        # Like FC6, the reply is an echo of the request
+        out[offset:offset + 6] = request
+        return 6
+
+    if func == 16:  # Write Multiple Registers
+        if len(request) < 7:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        addr, quantity = _unpack_addr_value(request, 2)
+        byte_count = request[6]
+        if not 1 <= quantity <= MAX_WRITE_REGISTERS or byte_count != 2 * quantity or len(request) != 7 + byte_count:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        if addr + quantity > 65536:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        entries = [registers.get(req_slave, addr + i) for i in range(quantity)]
+        missing = entries.count(None)
+        if missing == quantity or (missing and registers.unmapped_policy(req_slave) == UNMAPPED_EXCEPTION):
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        received = _merge_writes(entries, addr, struct.unpack_from(f'>{quantity}H', request, 7))
+        # Service calls run in the dispatcher's workers so the handler can take the next request
+        if not hass.data[DOMAIN]["writes"].submit([write for write in received if _has_write_action(write[0])]):
+            return _busy_response(out, offset, req_slave, func)
+        # Nothing awaits in here, so readers never see half a block
+        settle_until = hass.loop.time() + WRITE_SETTLE_TIME
+        for entry, value in received:
+            _store_master_write(registers, entry, value, settle_until)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Received %d register(s) from Master (Slave %d Reg %d)", quantity, req_slave, addr)
+        out[offset:offset + 6] = request[:6]
+        return 6
+
+    if func == 6:  # Write Single Register
+        if len(request) != 6:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_VALUE)
+        addr, word = _unpack_addr_value(request, 2)
+        matched_entry = registers.get(req_slave, addr)
+        if matched_entry is None:
+            return _exception_response(out, offset, req_slave, func, ILLEGAL_DATA_ADDRESS)
+        value_received = matched_entry["codec"].merge(matched_entry["value"], addr - matched_entry["register_addr"], (word,))
+        if _has_write_action(matched_entry) and not hass.data[DOMAIN]["writes"].submit([(matched_entry, value_received)]):
+            return _busy_response(out, offset, req_slave, func)
+        _store_master_write(registers, matched_entry, value_received, hass.loop.time() + WRITE_SETTLE_TIME)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Received %s from Master (Slave %d Reg %d)", value_received, req_slave, addr)
+        # The reply to FC6 is an echo of the request
+        out[offset:offset + 6] = request
+        return 6
+
+    return _exception_response(out, offset, req_slave, func, ILLEGAL_FUNCTION)
+
+_unpack_addr_value = struct.Struct('>HH').unpack_from
+
+def _store_master_write(registers, entry: dict, value, settle_until: float):
+    """Store a value the master wrote and hold it against source updates until ``settle_until``."""
+    entry["settle_until"] = settle_until
+    if entry["limits"] is not None:
+        # A source value held back from before the write is out of date now
+        entry["limits"].cancel()
+    registers.set_value(entry, value)
+
+def _merge_writes(entries: list, addr: int, words: tuple) -> list:
+    """Turn the registers a master wrote from ``addr`` into (entry, value) pairs.
+
+    ``entries`` holds the entry serving each written address, or None. An
+    entry spanning several registers gets one pair, with any of its
+    registers the master did not write keeping their current contents.
+    """
+    received = []
+    count = len(entries)
+    i = 0
+    while i < count:
+        entry = entries[i]
+        if entry is None:
+            i += 1
+            continue
+        end = i + 1
+        while end < count and entries[end] is entry:
+            end += 1
+        value = entry["codec"].merge(entry["value"], addr + i - entry["register_addr"], words[i:end])
+        received.append((entry, value))
+        i = end
+    return received
+
+def _exception_response(out: bytearray, offset: int, req_slave: int, func: int, code: int) -> int:
+    """Exception reply: the function code with its high bit set, then the exception code."""
+    _pack_reply_header(out, offset, req_slave, func | 0x80, code)
+    return 3
+
+def _busy_response(out: bytearray, offset: int, req_slave: int, func: int) -> int:
+    """Exception 06 (slave device busy), sent when the write queue is full."""
+    _LOGGER.warning("Write queue full; answered Slave %d function %d with busy", req_slave, func)
+    return _exception_response(out, offset, req_slave, func, SLAVE_DEVICE_BUSY)
+
+def _has_write_action(entry) -> bool:
+    """Whether a master write to this entry is forwarded to Home Assistant."""
+    if entry.get("direction", 'read_write') not in ('write_only', 'read_write', 'write_read'):
+        return False
+    if _switches_entity(entry):
+        return True
+    return bool(entry.get("write_service") or entry.get("write_target"))
+
+def _switches_entity(entry) -> bool:
+    """Whether a master write to this coil calls turn_on/turn_off on its entity (write_read coils without a service)."""
+    return (
+        entry.get("register_type") == REGISTER_COIL
+        and not entry.get("write_service")
+        and entry.get("direction", 'read_write') in ('read_write', 'write_read')
+        and bool(entry.get("write_entity") or entry.get("read_entity"))
+    )
+
+def _write_variables(entry, value_received: int) -> dict:
+    """Template variables for a value the master wrote to the register of ``entry``."""
+    codec = entry["codec"]
+    return {
+        'value': value_received,
+        'value_scaled': codec.scaled(value_received),
+        'mapped_value': codec.decode(value_received),
+    }
+
+def _build_service_call(hass: HomeAssistant, domain_service: str, entity: str | None, payload_template: str | None, variables: dict):
+    """Render a configured write service into (domain, service, service_data, rendered payload).
 
     variables provided to the template:
     - value: raw register value (int)
     - value_scaled: scaled numeric value (float)
     - mapped_value: reverse-mapped string or number
     """
+    if not domain_service or '.' not in domain_service:
+        raise ValueError("write_service must be in form 'domain.service'")
+    domain, service = domain_service.split('.', 1)
+
+    service_data = {}
+    rendered_str = None
+    if payload_template:
+        rendered = Template(str(payload_template), hass).async_render(variables)
+        rendered_str = rendered if isinstance(rendered, str) else str(rendered)
+        if rendered_str and rendered_str.strip():
+            try:
+                service_data = json.loads(rendered_str)
+            except json.JSONDecodeError as je:
+                _LOGGER.error(f"write_payload is not valid JSON after rendering: {je}. Rendered: {rendered_str}")
+                service_data = {}
+
+    # Ensure entity_id is present if provided
+    if entity and 'entity_id' not in service_data:
+        service_data['entity_id'] = entity
+
+    # Fallback defaults for common services if payload omitted or missing keys
     try:
-        if not domain_service or '.' not in domain_service:
-            raise ValueError("write_service must be in form 'domain.service'")
-        domain, service = domain_service.split('.', 1)
-
-        service_data = {}
-        rendered_str = None
-        if payload_template:
-            rendered = Template(str(payload_template), hass).async_render(variables)
-            rendered_str = rendered if isinstance(rendered, str) else str(rendered)
-            if rendered_str and rendered_str.strip():
-                try:
-                    service_data = json.loads(rendered_str)
-                except json.JSONDecodeError as je:
-                    _LOGGER.error(f"write_payload is not valid JSON after rendering: {je}. Rendered: {rendered_str}")
-                    service_data = {}
+        if domain == 'climate':
+            if service == 'set_temperature':
+                if not any(k in service_data for k in ('temperature', 'target_temp_high', 'target_temp_low')):
+                    service_data['temperature'] = variables.get('value_scaled')
+            elif service == 'set_hvac_mode':
+                if 'hvac_mode' not in service_data and variables.get('mapped_value') is not None:
+                    service_data['hvac_mode'] = str(variables.get('mapped_value')).lower()
+            elif service == 'set_preset_mode':
+                if 'preset_mode' not in service_data and variables.get('mapped_value') is not None:
+                    service_data['preset_mode'] = str(variables.get('mapped_value')).lower()
+    except Exception as e:
+        _LOGGER.debug(f"Error applying service defaults: {e}")
+
+    return domain, service, service_data, rendered_str
+
+def _write_is_redundant(hass: HomeAssistant, entry: dict, value_received) -> bool:
+    """Whether Home Assistant already has the value the master wrote.
+
+    When the write goes to the entity the register reads from, the value is
+    compared with what that entity's state encodes to, so a change made in
+    Home Assistant since the last write is still overridden. Otherwise it is
+    compared with the last value dispatched for the register.
+    """
+    read_entity = entry.get("read_entity")
+    write_entity = entry.get("write_entity")
+    if read_entity and (not write_entity or write_entity == read_entity):
+        state = hass.states.get(read_entity)
+        if state is None:
+            return False
+        attribute = entry.get("read_attribute")
+        raw = state.attributes.get(attribute) if attribute else state.state
+        if raw in _UNRESOLVED:
+            return False
+        return entry["codec"].encode(raw) == value_received
+    return value_received == entry["dispatched"]
 
-        # Ensure entity_id is present if provided
-        if entity and 'entity_id' not in service_data:
-            service_data['entity_id'] = entity
+async def _dispatch_writes(hass: HomeAssistant, writes: list):
+    """Forward a batch of master writes, given as (entry, value) pairs, to Home Assistant.
 
-        # Fallback defaults for common services if payload omitted or missing keys
+    Writes Home Assistant already has are skipped, so masters that rewrite
+    the same setpoint every scan cause no service calls. Calls to the same
+    service for the same target entity are merged into one call, and every
+    resulting call runs concurrently. Returns the number of skipped writes.
+    """
+    batched = {}
+    sources = {}
+    legacy = []
+    skipped = 0
+    for entry, value_received in writes:
+        if _write_is_redundant(hass, entry, value_received):
+            skipped += 1
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Skipped write of %s to Slave %s Reg %s; Home Assistant already has it", value_received, entry["slave_id"], entry["register_addr"])
+            continue
+        write_service = entry.get("write_service")
+        if _switches_entity(entry):
+            entity = entry.get("write_entity") or entry.get("read_entity")
+            # A coil switches its entity: switch.turn_on / switch.turn_off and the like
+            service = 'turn_on' if value_received else 'turn_off'
+            key = (entity.split('.', 1)[0], service, entity)
+            batched[key] = {'entity_id': entity}
+            sources.setdefault(key, []).append((entry, value_received))
+            continue
+        if not write_service:
+            # Fallback to legacy write_target behavior
+            write_target = entry.get("write_target")
+            if write_target:
+                legacy.append(_update_entity_attribute(hass, write_target, value_received, entry["codec"]))
+                entry["dispatched"] = value_received
+            continue
         try:
-            if domain == 'climate':
-                if service == 'set_temperature':
-                    if not any(k in service_data for k in ('temperature', 'target_temp_high', 'target_temp_low')):
-                        service_data['temperature'] = variables.get('value_scaled')
-                elif service == 'set_hvac_mode':
-                    if 'hvac_mode' not in service_data and variables.get('mapped_value') is not None:
-                        service_data['hvac_mode'] = str(variables.get('mapped_value')).lower()
-                elif service == 'set_preset_mode':
-                    if 'preset_mode' not in service_data and variables.get('mapped_value') is not None:
-                        service_data['preset_mode'] = str(variables.get('mapped_value')).lower()
+            entity = entry.get("write_entity") or entry.get("read_entity")
+            variables = _write_variables(entry, value_received)
+            domain, service, service_data, _ = _build_service_call(hass, write_service, entity, entry.get("write_payload"), variables)
         except Exception as e:
-            _LOGGER.debug(f"Error applying service defaults: {e}")
+            _LOGGER.error(f"Failed to prepare service {write_service}: {e}")
+            continue
+        key = (domain, service, str(service_data.get('entity_id')))
+        if key in batched:
+            batched[key].update(service_data)
+        else:
+            batched[key] = service_data
+        sources.setdefault(key, []).append((entry, value_received))
 
-        await hass.services.async_call(domain, service, service_data)
-        _LOGGER.info(f"Called service {domain}.{service} with {service_data} (rendered: {rendered_str})")
-    except Exception as e:
-        _LOGGER.error(f"Failed to call service {domain_service}: {e}")
+    async def _call(key, service_data):
+        domain, service, _ = key
+        try:
+            # Blocking is fine here: this runs in a dispatcher worker, not the serial loop,
+            # and it keeps calls for one register in order
+            await hass.services.async_call(domain, service, service_data, blocking=True)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Called service %s.%s with %s", domain, service, service_data)
+        except Exception as e:
+            _LOGGER.error("Failed to call service %s.%s: %s", domain, service, e)
+            return
+        for entry, value_received in sources[key]:
+            entry["dispatched"] = value_received
+
+    await asyncio.gather(
+        *(_call(key, service_data) for key, service_data in batched.items()),
+        *legacy,
+    )
+    return skipped
 
 @callback
-async def _update_entity_attribute(hass: HomeAssistant, write_target: str, value_received: int, value_map=None, scaling_factor=None):
+async def _update_entity_attribute(hass: HomeAssistant, write_target: str, value_received: int, codec: RegisterCodec):
     """Update entity state or attribute using reverse value mapping and scaling."""
     try:
         if '.' in write_target:
@@ -583,12 +1048,12 @@ async def _update_entity_attribute(hass: HomeAssistant, write_target: str, value
             state_obj = hass.states.get(entity_id)
             if state_obj:
                 # Convert numeric value back to string if value mapping exists
-                mapped_value = reverse_value_mapping(value_received, value_map, scaling_factor)
+                mapped_value = codec.decode(value_received)
                 
                 attrs = dict(state_obj.attributes)
                 attrs[attr] = mapped_value
                 hass.states.async_set(entity_id, state_obj.state, attrs)
-                _LOGGER.info(f"Updated {entity_id}.{attr} to '{mapped_value}' (from {value_received}, scaling: {scaling_factor})")
+                _LOGGER.debug("Updated %s.%s to '%s' (from %s, scaling: %s)", entity_id, attr, mapped_value, value_received, codec.scale)
             else:
                 _LOGGER.warning(f"Entity {entity_id} not found in HA")
         else:
@@ -597,7 +1062,7 @@ async def _update_entity_attribute(hass: HomeAssistant, write_target: str, value
             state_obj = hass.states.get(entity_id)
             if state_obj:
                 # Convert numeric value back to string if value mapping exists
-                mapped_value = reverse_value_mapping(value_received, value_map, scaling_factor)
+                mapped_value = codec.decode(value_received)
                 
                 # For climate entities, use service calls for proper state changes
                 if entity_id.startswith('climate.'):
@@ -605,7 +1070,7 @@ async def _update_entity_attribute(hass: HomeAssistant, write_target: str, value
                 else:
                     # For other entities, set state directly
                     hass.states.async_set(entity_id, mapped_value, state_obj.attributes)
-                    _LOGGER.info(f"Updated {entity_id} state to '{mapped_value}' (from {value_received}, scaling: {scaling_factor})")
+                    _LOGGER.debug("Updated %s state to '%s' (from %s, scaling: %s)", entity_id, mapped_value, value_received, codec.scale)
             else:
                 _LOGGER.warning(f"Entity {entity_id} not found in HA")
     except Exception as e:
@@ -625,7 +1090,7 @@ async def _update_climate_state(hass: HomeAssistant, entity_id: str, hvac_mode:
         else:
             _LOGGER.warning(f"Unknown HVAC mode '{hvac_mode}' for {entity_id}")
             
-        _LOGGER.info(f"Updated {entity_id} HVAC mode to '{hvac_mode}'")
+        _LOGGER.debug("Updated %s HVAC mode to '%s'", entity_id, hvac_mode)
     except Exception as e:
         _LOGGER.error(f"Error updating climate entity {entity_id}: {e}")
 
@@ -633,27 +1098,59 @@ async def async_unload_entry(hass, entry):
     """Unload a config entry."""
     entry_id = entry.entry_id
     entry_data = hass.data[DOMAIN]["entries"].get(entry_id)
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
     
-    # Clean up template tracker
-    if entry_data and entry_data.get("template_tracker") and callable(entry_data["template_tracker"]):
-        entry_data["template_tracker"]()
+    # Clean up state/template tracker
+    if entry_data and entry_data.get("tracker") and callable(entry_data["tracker"]):
+        entry_data["tracker"]()
     
     hass.data[DOMAIN]["entries"].pop(entry_id, None)
-    
-    # If this was the last entry, clean up the serial connection and task
+    row_keys = entry_data.get("register_map", ()) if entry_data else ()
+    snapshot = hass.data[DOMAIN]["snapshot"]
+    removed = [(key, hass.data[DOMAIN]["entries"].pop(key)) for key in row_keys]
+    if entry_data and not row_keys:
+        removed.append((entry_id, entry_data))
+    for key, register in removed:
+        # Held-back values are dropped with the entry
+        if register["limits"] is not None:
+            register["limits"].cancel()
+        if register["settle_timer"] is not None:
+            register["settle_timer"].cancel()
+        snapshot.keep(key, register)
+
+    # Close the entry's bus once nothing else uses it
+    bus = entry_data["bus"] if entry_data else None
+    if bus is not None:
+        for key in row_keys:
+            bus.registers.remove(key)
+        bus.registers.remove(entry_id)
+        bus.entry_ids.discard(entry_id)
+        bus.sensor_adders.pop(entry_id, None)
+        if bus.stats_entry_id == entry_id:
+            # Another entry takes the sensors over: right away if its sensor
+            # platform is already set up, otherwise when it is
+            bus.stats_entry_id = next(iter(bus.entry_ids), None)
+            add_entities = bus.sensor_adders.get(bus.stats_entry_id)
+            if add_entities is not None:
+                add_entities(bus_sensors(hass, bus))
+        if not bus.entry_ids:
+            snapshot.detach(bus)
+            await bus.async_close(hass)
+            hass.data[DOMAIN]["buses"].pop(bus.port, None)
+            _LOGGER.info(f"Stopped Modbus slave on {bus.port}")
+
+    # If this was the last entry, stop the shared workers
     if not hass.data[DOMAIN]["entries"]:
-        if hass.data[DOMAIN]["serial_task"]:
-            hass.data[DOMAIN]["serial_task"].cancel()
-            try:
-                await hass.data[DOMAIN]["serial_task"]
-            except asyncio.CancelledError:
-                pass
-            hass.data[DOMAIN]["serial_task"] = None
-            
-        if hass.data[DOMAIN]["serial_connection"]:
-            await hass.async_add_executor_job(hass.data[DOMAIN]["serial_connection"].close)
-            hass.data[DOMAIN]["serial_connection"] = None
-            
+        await hass.data[DOMAIN]["writes"].stop()
+        hass.data[DOMAIN]["templates"].stop()
+        await snapshot.async_save()
         _LOGGER.info("Stopped Modbus slave - all entries removed")
     
     return True
+
+
+async def async_remove_entry(hass, entry):
+    """Forget the snapshot values of a deleted entry, so a later entry at its addresses starts fresh."""
+    if DOMAIN in hass.data:
+        hass.data[DOMAIN]["snapshot"].forget(entry.entry_id)
@@ -0,0 +1,57 @@
+"""Micro-benchmark for the CRC16 backends in crc.py.
+
+Reports how many frames per second each backend can checksum for a typical
+8-byte request and for a full 256-byte frame.
+
+    python benchmarks/crc_benchmark.py [--seconds 1.0] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crc  # noqa: E402  (crc.py has no package-relative imports)
+
+FRAMES = {
+    "request_8": bytes([1, 3, 0, 0, 0, 10, 0xC5, 0xCD]),
+    "frame_256": bytes(range(256)),
+}
+
+
+def measure(func, frame, seconds):
+    """Return frames/sec for ``func`` over ``frame``."""
+    count = 0
+    batch = 1000
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(batch):
+            func(frame)
+        count += batch
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per backend and frame size")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in crc.BACKENDS.items():
+        results[name] = {label: measure(func, frame, args.seconds) for label, frame in FRAMES.items()}
+
+    if args.json:
+        print(json.dumps({"default": crc.DEFAULT_BACKEND, "frames_per_sec": results}, indent=2))
+        return
+    print(f"default backend: {crc.DEFAULT_BACKEND}")
+    print(f"{'backend':<10}" + "".join(f"{label:>16}" for label in FRAMES))
+    for name, row in results.items():
+        print(f"{name:<10}" + "".join(f"{row[label]:>16,.0f}" for label in FRAMES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Load test for the RTU slave: a scripted master against modbus_slave_handler over a pty pair.
+
+The slave side is the real handler, framer, register index and write
+queue, driven by a stubbed ``hass`` (no Home Assistant core is started;
+service calls are counted and dropped). The master runs in a forked
+process on the other end of the pty, sends one request at a time like a
+real RTU master, and times every reply. CPU per frame is the slave
+process's CPU time divided by the frames it answered.
+
+    python benchmarks/load_benchmark.py [--seconds 3] [--scenario fc3_single ...] [--json]
+    python benchmarks/load_benchmark.py --json > before.json
+    python benchmarks/load_benchmark.py --compare before.json
+    python benchmarks/load_benchmark.py --loop-load 5 --interval 2 [--realtime]
+
+``--loop-load`` blocks the event loop for the given number of
+milliseconds every ``LOAD_PERIOD``, like a callback doing blocking I/O would;
+``--realtime`` serves the bus from its own I/O thread instead. With
+``--interval`` the master waits between requests like a polling master, so
+the share of requests that hit a blocked loop shows in the percentiles.
+
+Needs the integration's Python dependencies (homeassistant) importable.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import random
+import select
+import sys
+import time
+import tty
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SLAVE_ID = 1
+OTHER_SLAVE_ID = 7
+REGISTERS = 125
+BAUDRATE = 115200
+REPLY_TIMEOUT = 0.5
+# Seconds between two blocking callbacks with --loop-load
+LOAD_PERIOD = 0.02
+
+
+def load_integration():
+    """Import the repository as the ``modbus_slave`` package."""
+    spec = importlib.util.spec_from_file_location(
+        "modbus_slave", os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["modbus_slave"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+ms = load_integration()
+from modbus_slave.bus import ModbusBus  # noqa: E402
+from modbus_slave.const import (  # noqa: E402
+    CONF_DIRECTION,
+    CONF_REGISTER_ADDR,
+    CONF_SLAVE_ID,
+    CONF_WRITE_ENTITY,
+    CONF_WRITE_SERVICE,
+    DOMAIN,
+)
+from modbus_slave.crc import calc_crc, get_backend  # noqa: E402
+from modbus_slave.dispatch import WriteDispatcher  # noqa: E402
+
+
+def rtu(*pdu):
+    frame = bytes(pdu)
+    return frame + calc_crc(frame)
+
+
+def fc3_single(i, rng):
+    return rtu(SLAVE_ID, 3, 0, 0, 0, 1), 7
+
+
+def fc3_block(i, rng):
+    return rtu(SLAVE_ID, 3, 0, 0, 0, REGISTERS), 5 + 2 * REGISTERS
+
+
+def fc6(i, rng):
+    value = i & 0xFFFF
+    return rtu(SLAVE_ID, 6, 0, 5, value >> 8, value & 0xFF), 8
+
+
+def fc16(i, rng):
+    quantity = 10
+    data = b"".join(((i + n) & 0xFFFF).to_bytes(2, "big") for n in range(quantity))
+    return rtu(SLAVE_ID, 16, 0, 0, 0, quantity, 2 * quantity, *data), 8
+
+
+def noisy_bus(i, rng):
+    """FC3 behind line noise and a request for another slave on the same bus."""
+    noise = bytes(rng.randrange(256) for _ in range(rng.randrange(1, 9)))
+    other = rtu(OTHER_SLAVE_ID, 3, 0, 0, 0, 2)
+    request, reply_length = fc3_single(i, rng)
+    return noise + other + request, reply_length
+
+
+SCENARIOS = {
+    "fc3_single": fc3_single,
+    "fc3_block": fc3_block,
+    "fc6": fc6,
+    "fc16": fc16,
+    "noisy_bus": noisy_bus,
+}
+
+
+def run_master(fd, scenario, seconds, conn, interval=0):
+    """Child process: send requests back to back, or every ``interval`` seconds, and time each reply."""
+    build = SCENARIOS[scenario]
+    rng = random.Random(0)
+    latencies = []
+    timeouts = 0
+    i = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        request, reply_length = build(i, rng)
+        i += 1
+        sent = time.perf_counter()
+        os.write(fd, request)
+        received = 0
+        while received < reply_length:
+            ready, _, _ = select.select([fd], [], [], REPLY_TIMEOUT)
+            if not ready:
+                break
+            received += len(os.read(fd, 4096))
+        if received < reply_length:
+            timeouts += 1
+            # Let the slave's framer see a silence and resync
+            time.sleep(0.05)
+            continue
+        latencies.append(time.perf_counter() - sent)
+        if interval:
+            time.sleep(max(sent + interval - time.perf_counter(), 0))
+    conn.send((latencies, timeouts))
+    conn.close()
+
+
+class StubServices:
+    def __init__(self):
+        self.calls = 0
+
+    async def async_call(self, domain, service, service_data, blocking=False):
+        self.calls += 1
+
+
+class StubHass:
+    """Just enough of ``HomeAssistant`` for the serial handler and the write queue."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.data = {}
+        self.services = StubServices()
+
+    def async_create_background_task(self, coro, name=None):
+        return self.loop.create_task(coro, name=name)
+
+    def async_add_executor_job(self, func, *args):
+        return self.loop.run_in_executor(None, func, *args)
+
+
+async def _count_writes(hass, writes):
+    for _ in writes:
+        await hass.services.async_call("climate", "set_temperature", {})
+
+
+def make_bus(hass, port):
+    """A bus with ``REGISTERS`` write_read registers, built like the integration builds its entries."""
+    bus = ModbusBus(port, BAUDRATE)
+    for addr in range(REGISTERS):
+        entry = ms._make_entry({
+            CONF_SLAVE_ID: SLAVE_ID,
+            CONF_REGISTER_ADDR: addr,
+            CONF_DIRECTION: "write_read",
+            CONF_WRITE_SERVICE: "climate.set_temperature",
+            CONF_WRITE_ENTITY: "climate.bench",
+        }, bus)
+        entry["value"] = addr
+        hass.data[DOMAIN]["entries"][f"bench_{addr}"] = entry
+        bus.registers.add(f"bench_{addr}", entry)
+    return bus
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def block_loop(milliseconds):
+    """Hog the event loop like a slow callback doing blocking I/O in another integration."""
+    while True:
+        await asyncio.sleep(LOAD_PERIOD)
+        # Home Assistant refuses time.sleep() on the loop; select() blocks the same way
+        select.select([], [], [], milliseconds / 1000)
+
+
+async def run_scenario(scenario, seconds, loop_load=0, realtime=False, interval=0):
+    loop = asyncio.get_running_loop()
+    hass = StubHass(loop)
+    writes = WriteDispatcher(hass, _count_writes)
+    hass.data[DOMAIN] = {"entries": {}, "buses": {}, "writes": writes}
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    tty.setraw(slave_fd)
+    os.set_blocking(slave_fd, False)
+    port = os.ttyname(slave_fd)
+    bus = make_bus(hass, port)
+    # The handler only needs the fd; pyserial is not involved
+    bus.serial_connection = types.SimpleNamespace(port=port, baudrate=BAUDRATE, fileno=lambda: slave_fd, is_open=False)
+    writes.start()
+    bus.realtime = realtime
+    bus.start(hass, ms.modbus_realtime_handler if realtime else ms.modbus_slave_handler)
+    load = loop.create_task(block_loop(loop_load)) if loop_load else None
+    await asyncio.sleep(0.05)
+
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    master = multiprocessing.get_context("fork").Process(
+        target=run_master, args=(master_fd, scenario, seconds, child_conn, interval), daemon=True
+    )
+    cpu_start = time.process_time()
+    master.start()
+    latencies, timeouts = await loop.run_in_executor(None, parent_conn.recv)
+    cpu = time.process_time() - cpu_start
+    master.join()
+
+    if load is not None:
+        load.cancel()
+    await bus.async_close(hass)
+    await writes.stop()
+    os.close(master_fd)
+    os.close(slave_fd)
+
+    latencies.sort()
+    frames = len(latencies)
+    return {
+        "frames": frames,
+        "timeouts": timeouts,
+        "frames_per_sec": round(frames / seconds, 1),
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 3) if frames else None,
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if frames else None,
+        "latency_max_ms": round(latencies[-1] * 1000, 3) if frames else None,
+        "cpu_us_per_frame": round(cpu / frames * 1e6, 1) if frames else None,
+        "service_calls": hass.services.calls,
+        "crc_errors": bus.stats.crc_errors,
+        "cache_hits": bus.registers.cache.hits,
+    }
+
+
+def compare(baseline, results):
+    print(f"{'scenario':<12}{'metric':<18}{'baseline':>12}{'current':>12}{'change':>10}")
+    for scenario, row in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(scenario)
+        if not base:
+            continue
+        for metric in ("frames_per_sec", "latency_p50_ms", "latency_p99_ms", "latency_max_ms", "cpu_us_per_frame"):
+            old, new = base.get(metric), row.get(metric)
+            change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else "n/a"
+            print(f"{scenario:<12}{metric:<18}{old if old is not None else '-':>12}{new if new is not None else '-':>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each scenario")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a previous --json result")
+    parser.add_argument("--loop-load", type=float, default=0, metavar="MS", help="block the event loop this long every 20 ms")
+    parser.add_argument("--realtime", action="store_true", help="serve the bus from its real-time I/O thread")
+    parser.add_argument("--interval", type=float, default=0, metavar="MS", help="master waits this long between requests")
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT, "manifest.json")) as manifest:
+        version = json.load(manifest).get("version")
+    results = {
+        "version": version,
+        "python": platform.python_version(),
+        "crc_backend": get_backend(),
+        "seconds": args.seconds,
+        "loop_load_ms": args.loop_load,
+        "realtime": args.realtime,
+        "interval_ms": args.interval,
+        "scenarios": {},
+    }
+    for scenario in args.scenario or SCENARIOS:
+        results["scenarios"][scenario] = asyncio.run(run_scenario(scenario, args.seconds, args.loop_load, args.realtime, args.interval / 1000))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(json.load(baseline), results)
+        return
+    print(f"version {version}, python {results['python']}, crc backend {results['crc_backend']}")
+    print(f"{'scenario':<12}{'frames/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'cpu us/frame':>14}{'timeouts':>10}")
+    for scenario, row in results["scenarios"].items():
+        print(
+            f"{scenario:<12}{row['frames_per_sec']:>10}{row['latency_p50_ms'] or '-':>10}"
+            f"{row['latency_p99_ms'] or '-':>10}{row['latency_max_ms'] or '-':>10}{row['cpu_us_per_frame'] or '-':>14}{row['timeouts']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
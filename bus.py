@@ -0,0 +1,94 @@
+import asyncio
+import logging
+
+import serial
+
+from .framer import MAX_FRAME_SIZE
+from .registers import RegisterIndex
+from .stats import BusStats
+from .traffic import TrafficSummary
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ModbusBus:
+    """One serial port with its own register index and handler task.
+
+    Buses are independent: each has its own framer (created by its handler),
+    its own registers and its own task, so traffic on one port never waits
+    behind another. A ``realtime`` bus answers reads from its own I/O
+    thread (see ``realtime.RealtimeResponder``). ``tcp_listener``, if set,
+    is a ``tcp.ModbusTcpBus`` serving the same registers to TCP masters; it
+    is closed with the bus.
+    """
+
+    def __init__(self, port, baudrate, realtime=False):
+        self.port = port
+        self.baudrate = baudrate
+        self.realtime = realtime
+        self.registers = RegisterIndex()
+        self.traffic = TrafficSummary(port)
+        self.stats = BusStats()
+        # Entry whose sensor platform shows this bus's diagnostic sensors
+        self.stats_entry_id = None
+        # entry_id -> async_add_entities of its sensor platform
+        self.sensor_adders = {}
+        # Replies are built here in place, one at a time
+        self.response = bytearray(MAX_FRAME_SIZE)
+        self.serial_connection = None
+        self.task = None
+        self.entry_ids = set()
+        self.tcp_listener = None
+
+    def __repr__(self):
+        return f"<ModbusBus {self.port} @ {self.baudrate}>"
+
+    async def async_open(self, hass):
+        """Open the serial port if it is not open yet."""
+        if self.serial_connection is not None:
+            return
+
+        def create_serial_connection():
+            return serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                timeout=1,
+                parity='N',
+                stopbits=2,
+                bytesize=8,
+            )
+
+        self.serial_connection = await hass.async_add_executor_job(create_serial_connection)
+        _LOGGER.info(f"Opened serial port {self.port} at {self.baudrate} baud")
+
+    def start(self, hass, handler):
+        """Run ``handler(hass, bus)`` as this bus's background task unless it is already running."""
+        if self.task is not None and not self.task.done():
+            _LOGGER.debug(f"Modbus slave handler for {self.port} already running; not starting another")
+            return
+        name = f"modbus_slave_handler {self.port}"
+        # Prefer background task to avoid blocking startup
+        if hasattr(hass, "async_create_background_task"):
+            self.task = hass.async_create_background_task(handler(hass, self), name=name)
+        else:
+            self.task = hass.async_create_task(handler(hass, self))
+        _LOGGER.info(f"Started Modbus slave handler task for {self.port}")
+
+    async def async_close(self, hass):
+        """Stop the handler task and the TCP listener, and close the serial port."""
+        if self.tcp_listener is not None:
+            await self.tcp_listener.async_close(hass)
+            self.tcp_listener = None
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        self.traffic.close()
+
+        if self.serial_connection is not None:
+            if self.serial_connection.is_open:
+                await hass.async_add_executor_job(self.serial_connection.close)
+            self.serial_connection = None
@@ -0,0 +1,219 @@
+import logging
+import math
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+# Built-in string -> register mappings, used when the entry's value_map has no match
+COMMON_MAPPINGS = {
+    'off': 0,
+    'heat': 1,
+    'cool': 2,
+    'auto': 3,
+    'dry': 4,
+    'fan_only': 5,
+    'idle': 0,
+    'heating': 1,
+    'cooling': 2,
+    'false': 0,
+    'true': 1,
+    'on': 1,
+    'unknown': 0,
+    'unavailable': 0,
+}
+
+# Built-in register -> string mappings for unscaled writes
+COMMON_REVERSE_MAPPINGS = {
+    0: 'off',
+    1: 'heat',
+    2: 'cool',
+    3: 'auto',
+    4: 'dry',
+    5: 'fan_only',
+}
+
+
+# Register data types: struct format (big-endian) and number of registers
+DATA_TYPES = {
+    'int16': ('h', 1),
+    'uint16': ('H', 1),
+    'int32': ('i', 2),
+    'uint32': ('I', 2),
+    'float32': ('f', 2),
+    'int64': ('q', 4),
+}
+DEFAULT_DATA_TYPE = 'int16'
+_UNSIGNED_FORMATS = {1: 'H', 2: 'I', 4: 'Q'}
+_word = struct.Struct('>H')
+
+
+def _byte_order(registers, word_order, byte_order):
+    """Positions of the big-endian bytes in wire order, or None when they already are."""
+    words = [[2 * i, 2 * i + 1] for i in range(registers)]
+    if word_order == 'little':
+        words.reverse()
+    if byte_order == 'little':
+        words = [word[::-1] for word in words]
+    order = tuple(index for word in words for index in word)
+    # Reversing words and swapping bytes are their own inverse, so the same
+    # positions convert wire order back to big-endian
+    return None if order == tuple(range(2 * registers)) else order
+
+
+# First characters of the strings float() is tried on before the mappings
+_NUMBER_START = frozenset('0123456789+-.')
+
+
+def _is_numeric(text):
+    try:
+        float(text)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+class RegisterCodec:
+    """Conversion between Home Assistant values and an entry's registers, compiled once per entry.
+
+    The value map is folded together with the built-in mappings into a
+    lowercased forward dict and an int-keyed reverse dict, so converting a
+    value is a type check plus one dict lookup.
+
+    ``data_type`` decides how many registers the value spans and how it is
+    packed into them; ``word_order`` and ``byte_order`` (``big`` or
+    ``little``) give the order of the registers and of the bytes in each
+    register on the wire. Integers out of range are clamped; signed types
+    also accept values up to the unsigned maximum, as 16-bit registers
+    always have.
+    """
+
+    __slots__ = (
+        "scale", "data_type", "registers", "_multiplier", "_forward", "_reverse",
+        "_float", "_struct", "_unsigned", "_low", "_high", "_order",
+    )
+
+    def __init__(self, value_map=None, scale=1, data_type=DEFAULT_DATA_TYPE, word_order='big', byte_order='big'):
+        self.scale = scale
+        self._multiplier = scale if scale and scale > 1 else 1
+        self.data_type = data_type
+        fmt, self.registers = DATA_TYPES[data_type]
+        self._float = fmt == 'f'
+        self._struct = struct.Struct('>' + fmt)
+        self._unsigned = struct.Struct('>' + _UNSIGNED_FORMATS[self.registers])
+        bits = 16 * self.registers
+        self._high = (1 << bits) - 1
+        self._low = -(1 << (bits - 1)) if fmt.islower() else 0
+        self._order = _byte_order(self.registers, word_order, byte_order)
+
+        forward = dict(COMMON_MAPPINGS)
+        reverse = {}
+        if value_map and isinstance(value_map, dict):
+            custom = {}
+            for key, value in value_map.items():
+                try:
+                    number = int(float(value))
+                except (ValueError, TypeError):
+                    _LOGGER.warning(f"Value map contains non-numeric value: {key} -> {value}")
+                    continue
+                # Numeric strings convert directly and never reach the map
+                if not _is_numeric(str(key).strip()):
+                    custom.setdefault(str(key).lower(), number)
+                reverse.setdefault(number, str(key))
+            forward.update(custom)
+        if self._multiplier == 1:
+            for number, text in COMMON_REVERSE_MAPPINGS.items():
+                reverse.setdefault(number, text)
+        self._forward = forward
+        self._reverse = reverse
+
+    def encode(self, result_value):
+        """Convert a state, attribute or template result into a register value.
+
+        Behavior:
+        - If result is numeric: apply scale (multiply) and return int(round(...)),
+          or the scaled float for float32.
+        - Else if mapping provided: map string to int without scaling.
+        - Else try built-in mappings; otherwise 0.
+        """
+        kind = type(result_value)
+        if kind is int or kind is float:
+            try:
+                scaled = result_value * self._multiplier
+                return scaled if self._float else int(round(scaled))
+            except (ValueError, OverflowError):
+                return 0
+        if result_value is None:
+            return 0
+        text = result_value if kind is str else str(result_value)
+        text = text.strip()
+        # Most states are numbers; no mapping key is numeric, so convert those first
+        if text and text[0] in _NUMBER_START:
+            try:
+                scaled = float(text) * self._multiplier
+                return scaled if self._float else int(round(scaled))
+            except (ValueError, OverflowError):
+                pass
+        mapped = self._forward.get(text)
+        if mapped is None:
+            mapped = self._forward.get(text.lower())
+        if mapped is not None:
+            return mapped
+        try:
+            scaled = float(text) * self._multiplier
+            return scaled if self._float else int(round(scaled))
+        except (ValueError, TypeError, OverflowError):
+            pass
+        _LOGGER.warning("Could not convert template result '%s' to numeric value, using 0", result_value)
+        return 0
+
+    def pack(self, value):
+        """Register bytes for ``value``, in wire order."""
+        if self._float:
+            try:
+                data = self._struct.pack(value)
+            except OverflowError:
+                data = self._struct.pack(math.copysign(math.inf, value))
+        else:
+            value = int(value)
+            if value < self._low:
+                value = self._low
+            elif value > self._high:
+                value = self._high
+            data = self._unsigned.pack(value & self._high)
+        order = self._order
+        return data if order is None else bytes([data[index] for index in order])
+
+    def unpack(self, data):
+        """Value held by register bytes in wire order."""
+        order = self._order
+        if order is not None:
+            data = bytes([data[index] for index in order])
+        return self._struct.unpack(data)[0]
+
+    def merge(self, value, index, words):
+        """Value after the master writes ``words`` from register ``index`` of this entry on."""
+        if self.registers == 1:
+            return self.unpack(_word.pack(words[0]))
+        data = bytearray(self.pack(value))
+        struct.pack_into(f'>{len(words)}H', data, 2 * index, *words)
+        return self.unpack(data)
+
+    def scaled(self, raw):
+        """Register value divided by the scale, as float."""
+        return float(raw) / float(self._multiplier)
+
+    def decode(self, raw):
+        """Convert a register value written by the master into the value sent to Home Assistant."""
+        if self._float and not float(raw).is_integer():
+            # Fractions never match the int-keyed reverse mappings
+            return str(raw / self._multiplier)
+        if self._multiplier == 1:
+            mapped = self._reverse.get(int(raw))
+            return mapped if mapped is not None else str(int(raw))
+        numeric = raw / self._multiplier
+        mapped = self._reverse.get(int(numeric))
+        if mapped is not None:
+            return mapped
+        if numeric != int(numeric):
+            return str(numeric)
+        return str(int(numeric))
@@ -5,6 +5,8 @@ from homeassistant.helpers.selector import (
     EntitySelector,
     SelectSelector,
     SelectSelectorConfig,
+    TextSelector,
+    TextSelectorConfig,
 )
 
 from .const import (
@@ -21,7 +23,55 @@ from .const import (
     CONF_WRITE_SERVICE,
     CONF_WRITE_ENTITY,
     CONF_WRITE_PAYLOAD,
+    CONF_UNMAPPED_POLICY,
+    CONF_REGISTER_TYPE,
+    CONF_DATA_TYPE,
+    CONF_WORD_ORDER,
+    CONF_BYTE_ORDER,
+    CONF_REGISTER_MAP,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_REALTIME,
+    CONF_SERVE_TCP,
 )
+from .register_map import MAP_FILE_EXTENSIONS, RegisterMapError, parse_register_map
+from .tcp import is_tcp_port, parse_tcp_port
+
+UNMAPPED_POLICIES = ["zero_fill", "exception"]
+REGISTER_TYPES = ["holding", "coil", "discrete_input"]
+DATA_TYPES = ["int16", "uint16", "int32", "uint32", "float32", "int64"]
+ORDERS = ["big", "little"]
+LIMIT_KEYS = [CONF_DEADBAND, CONF_DEADBAND_PERCENT, CONF_MIN_INTERVAL, CONF_MAX_STALENESS]
+NON_NEGATIVE = vol.All(vol.Coerce(float), vol.Range(min=0))
+
+
+def _valid_tcp_listener(serial_port: str, url: str) -> bool:
+    """Whether ``url`` can serve the registers of ``serial_port`` to TCP masters; empty means no listener."""
+    if not url:
+        return True
+    if is_tcp_port(serial_port):
+        return False
+    try:
+        parse_tcp_port(url)
+    except ValueError:
+        return False
+    return True
+
+
+async def _load_register_map(hass, text: str, slave_id: int):
+    """Parse a pasted table, or a CSV/JSON/YAML file named relative to the config directory."""
+    text = text.strip()
+    if "\n" not in text and text.lower().endswith(MAP_FILE_EXTENSIONS):
+        def _read():
+            with open(hass.config.path(text), encoding="utf-8") as table:
+                return table.read()
+        try:
+            text = await hass.async_add_executor_job(_read)
+        except OSError as e:
+            raise RegisterMapError(f"cannot read {text}: {e}") from None
+    return parse_register_map(text, slave_id)
 
 
 def _shorten(val: str, max_len: int = 32) -> str:
@@ -75,24 +125,90 @@ class ModbusSlaveConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._data: dict = {}
 
     async def async_step_user(self, user_input=None):
+        """Choose between one register and a register map."""
+        return self.async_show_menu(
+            step_id="user",
+            menu_options={"register": "Single register", "register_map": "Register map (CSV/JSON/YAML table)"},
+        )
+
+    async def async_step_register_map(self, user_input=None):
+        """Many registers in one entry, from an imported table."""
+        errors = {}
+        placeholders = {"error": ""}
+        if user_input is not None:
+            serve_tcp = user_input.get(CONF_SERVE_TCP, "").strip()
+            try:
+                rows = await _load_register_map(self.hass, user_input[CONF_REGISTER_MAP], user_input[CONF_SLAVE_ID])
+            except RegisterMapError as e:
+                errors[CONF_REGISTER_MAP] = "invalid_register_map"
+                placeholders["error"] = str(e)
+            if not _valid_tcp_listener(user_input[CONF_SERIAL_PORT], serve_tcp):
+                errors[CONF_SERVE_TCP] = "invalid_tcp_listener"
+            if not errors:
+                title = f"Register map | {user_input[CONF_SERIAL_PORT]} | {len(rows)} registers"
+                return self.async_create_entry(title=title, data={
+                    CONF_SERIAL_PORT: user_input[CONF_SERIAL_PORT],
+                    CONF_BAUDRATE: user_input[CONF_BAUDRATE],
+                    CONF_REALTIME: user_input.get(CONF_REALTIME, False),
+                    CONF_SERVE_TCP: serve_tcp,
+                    CONF_SLAVE_ID: user_input[CONF_SLAVE_ID],
+                    CONF_UNMAPPED_POLICY: user_input.get(CONF_UNMAPPED_POLICY, "zero_fill"),
+                    CONF_REGISTER_MAP: rows,
+                })
+
+        user_input = user_input or {}
+        schema = vol.Schema({
+            vol.Required(CONF_SERIAL_PORT, default=user_input.get(CONF_SERIAL_PORT, "/dev/ttyUSB0")): str,
+            vol.Required(CONF_BAUDRATE, default=user_input.get(CONF_BAUDRATE, 9600)): int,
+            vol.Optional(CONF_REALTIME, default=user_input.get(CONF_REALTIME, False)): bool,
+            vol.Optional(CONF_SERVE_TCP, default=user_input.get(CONF_SERVE_TCP, "")): str,
+            vol.Required(CONF_SLAVE_ID, default=user_input.get(CONF_SLAVE_ID, 10)): int,
+            vol.Optional(CONF_UNMAPPED_POLICY, default=user_input.get(CONF_UNMAPPED_POLICY, "zero_fill")): vol.In(UNMAPPED_POLICIES),
+            vol.Required(CONF_REGISTER_MAP, default=user_input.get(CONF_REGISTER_MAP, "")): TextSelector(TextSelectorConfig(multiline=True)),
+        })
+        return self.async_show_form(
+            step_id="register_map", data_schema=schema, errors=errors, description_placeholders=placeholders
+        )
+
+    async def async_step_register(self, user_input=None):
         """Step 1: Register settings only."""
+        errors = {}
         if user_input is not None:
+            serve_tcp = user_input.get(CONF_SERVE_TCP, "").strip()
+            if not _valid_tcp_listener(user_input[CONF_SERIAL_PORT], serve_tcp):
+                errors[CONF_SERVE_TCP] = "invalid_tcp_listener"
+        if user_input is not None and not errors:
             # Save and go to step 2
             self._data.update({
                 CONF_SERIAL_PORT: user_input[CONF_SERIAL_PORT],
                 CONF_BAUDRATE: user_input[CONF_BAUDRATE],
+                CONF_REALTIME: user_input.get(CONF_REALTIME, False),
+                CONF_SERVE_TCP: serve_tcp,
                 CONF_SLAVE_ID: user_input[CONF_SLAVE_ID],
                 CONF_REGISTER_ADDR: user_input[CONF_REGISTER_ADDR],
+                CONF_REGISTER_TYPE: user_input.get(CONF_REGISTER_TYPE, "holding"),
+                CONF_DATA_TYPE: user_input.get(CONF_DATA_TYPE, "int16"),
+                CONF_WORD_ORDER: user_input.get(CONF_WORD_ORDER, "big"),
+                CONF_BYTE_ORDER: user_input.get(CONF_BYTE_ORDER, "big"),
+                CONF_UNMAPPED_POLICY: user_input.get(CONF_UNMAPPED_POLICY, "zero_fill"),
             })
             return await self.async_step_source()
 
+        user_input = user_input or {}
         schema = vol.Schema({
-            vol.Required(CONF_SERIAL_PORT, default="/dev/ttyUSB0"): str,
-            vol.Required(CONF_BAUDRATE, default=9600): int,
-            vol.Required(CONF_SLAVE_ID, default=10): int,
-            vol.Required(CONF_REGISTER_ADDR, default=0): int,
+            vol.Required(CONF_SERIAL_PORT, default=user_input.get(CONF_SERIAL_PORT, "/dev/ttyUSB0")): str,
+            vol.Required(CONF_BAUDRATE, default=user_input.get(CONF_BAUDRATE, 9600)): int,
+            vol.Optional(CONF_REALTIME, default=user_input.get(CONF_REALTIME, False)): bool,
+            vol.Optional(CONF_SERVE_TCP, default=user_input.get(CONF_SERVE_TCP, "")): str,
+            vol.Required(CONF_SLAVE_ID, default=user_input.get(CONF_SLAVE_ID, 10)): int,
+            vol.Required(CONF_REGISTER_ADDR, default=user_input.get(CONF_REGISTER_ADDR, 0)): int,
+            vol.Optional(CONF_REGISTER_TYPE, default=user_input.get(CONF_REGISTER_TYPE, "holding")): vol.In(REGISTER_TYPES),
+            vol.Optional(CONF_DATA_TYPE, default=user_input.get(CONF_DATA_TYPE, "int16")): vol.In(DATA_TYPES),
+            vol.Optional(CONF_WORD_ORDER, default=user_input.get(CONF_WORD_ORDER, "big")): vol.In(ORDERS),
+            vol.Optional(CONF_BYTE_ORDER, default=user_input.get(CONF_BYTE_ORDER, "big")): vol.In(ORDERS),
+            vol.Optional(CONF_UNMAPPED_POLICY, default=user_input.get(CONF_UNMAPPED_POLICY, "zero_fill")): vol.In(UNMAPPED_POLICIES),
         })
-        return self.async_show_form(step_id="user", data_schema=schema)
+        return self.async_show_form(step_id="register", data_schema=schema, errors=errors)
 
     async def async_step_source(self, user_input=None):
         """Step 2: Select entity (input type is implicitly 'entity')."""
@@ -192,6 +308,8 @@ class ModbusSlaveConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 })
 
             title = f"Slave ID {self._data.get(CONF_SLAVE_ID, '')} | Register {self._data.get(CONF_REGISTER_ADDR, '')}"
+            if self._data.get(CONF_REGISTER_TYPE, "holding") != "holding":
+                title += f" ({self._data[CONF_REGISTER_TYPE]})"
             return self.async_create_entry(title=title, data=self._data)
 
         # Initial render for details step
@@ -221,6 +339,8 @@ class ModbusSlaveOptionsFlow(config_entries.OptionsFlow):
     async def async_step_init(self, user_input=None):
         # Determine current values
         current = self.config_entry.data
+        if CONF_REGISTER_MAP in current:
+            return await self.async_step_register_map(user_input)
 
         # Determine attribute selector from provided or existing entity
         selected_entity = None
@@ -229,6 +349,8 @@ class ModbusSlaveOptionsFlow(config_entries.OptionsFlow):
         else:
             selected_entity = current.get(CONF_READ_ENTITY)
         attr_field = _attr_selector(self.hass, selected_entity)
+        # Limits only ever come from the options, so show the ones in effect
+        limits = self.config_entry.options
 
         if user_input is not None:
             errors = {}
@@ -252,6 +374,11 @@ class ModbusSlaveOptionsFlow(config_entries.OptionsFlow):
                         vol.Optional(CONF_WRITE_ENTITY, default=user_input.get(CONF_WRITE_ENTITY, current.get(CONF_WRITE_ENTITY, ""))): EntitySelector(),
                         vol.Optional(CONF_WRITE_PAYLOAD, default=user_input.get(CONF_WRITE_PAYLOAD, current.get(CONF_WRITE_PAYLOAD, ""))): str,
                         vol.Optional(CONF_VALUE_MAP, default=value_map_raw or ""): str,
+                        vol.Optional(CONF_UNMAPPED_POLICY, default=user_input.get(CONF_UNMAPPED_POLICY, current.get(CONF_UNMAPPED_POLICY, "zero_fill"))): vol.In(UNMAPPED_POLICIES),
+                        **{
+                            vol.Optional(key, default=user_input.get(key, limits.get(key, 0))): NON_NEGATIVE
+                            for key in LIMIT_KEYS
+                        },
                     }),
                     errors=errors,
                 )
@@ -274,6 +401,34 @@ class ModbusSlaveOptionsFlow(config_entries.OptionsFlow):
             vol.Optional(CONF_WRITE_ENTITY, default=current.get(CONF_WRITE_ENTITY, "")): EntitySelector(),
             vol.Optional(CONF_WRITE_PAYLOAD, default=current.get(CONF_WRITE_PAYLOAD, "")): str,
             vol.Optional(CONF_VALUE_MAP, default=current_value_map): str,
+            vol.Optional(CONF_UNMAPPED_POLICY, default=current.get(CONF_UNMAPPED_POLICY, "zero_fill")): vol.In(UNMAPPED_POLICIES),
+            **{vol.Optional(key, default=limits.get(key, 0)): NON_NEGATIVE for key in LIMIT_KEYS},
         })
 
         return self.async_show_form(step_id="init", data_schema=schema)
+
+    async def async_step_register_map(self, user_input=None):
+        """Replace a register map's table; the entry reloads with the new rows."""
+        current = {**self.config_entry.data, **self.config_entry.options}
+        errors = {}
+        placeholders = {"error": ""}
+        if user_input is not None:
+            try:
+                rows = await _load_register_map(self.hass, user_input[CONF_REGISTER_MAP], current[CONF_SLAVE_ID])
+            except RegisterMapError as e:
+                errors[CONF_REGISTER_MAP] = "invalid_register_map"
+                placeholders["error"] = str(e)
+            else:
+                return self.async_create_entry(title="", data={
+                    CONF_UNMAPPED_POLICY: user_input.get(CONF_UNMAPPED_POLICY, "zero_fill"),
+                    CONF_REGISTER_MAP: rows,
+                })
+
+        user_input = user_input or {}
+        schema = vol.Schema({
+            vol.Optional(CONF_UNMAPPED_POLICY, default=user_input.get(CONF_UNMAPPED_POLICY, current.get(CONF_UNMAPPED_POLICY, "zero_fill"))): vol.In(UNMAPPED_POLICIES),
+            vol.Required(CONF_REGISTER_MAP, default=user_input.get(CONF_REGISTER_MAP, "")): TextSelector(TextSelectorConfig(multiline=True)),
+        })
+        return self.async_show_form(
+            step_id="register_map", data_schema=schema, errors=errors, description_placeholders=placeholders
+        )
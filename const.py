@@ -16,3 +16,15 @@ CONF_SCALE = "scale"  # numeric multiplier for register representation
 CONF_WRITE_SERVICE = "write_service"  # e.g., climate.set_temperature
 CONF_WRITE_ENTITY = "write_entity"  # optional override entity for write
 CONF_WRITE_PAYLOAD = "write_payload"  # JSON string with templated values
+CONF_UNMAPPED_POLICY = "unmapped_policy"  # zero_fill or exception for unmapped addresses in a block read
+CONF_REGISTER_TYPE = "register_type"  # holding, coil or discrete_input
+CONF_DATA_TYPE = "data_type"  # int16, uint16, int32, uint32, float32 or int64
+CONF_WORD_ORDER = "word_order"  # big (high register first) or little
+CONF_BYTE_ORDER = "byte_order"  # big (high byte first within a register) or little
+CONF_REGISTER_MAP = "register_map"  # rows of a register map entry, parsed from CSV/JSON/YAML
+CONF_DEADBAND = "deadband"  # least change, in source units, that rewrites the register
+CONF_DEADBAND_PERCENT = "deadband_percent"  # least change relative to the register's current value
+CONF_MIN_INTERVAL = "min_interval"  # seconds between two updates of the register
+CONF_MAX_STALENESS = "max_staleness"  # seconds a change held back by the deadband can wait
+CONF_REALTIME = "realtime"  # answer reads on a serial port from a dedicated I/O thread
+CONF_SERVE_TCP = "serve_tcp"  # tcp:// or rtu-over-tcp:// URL also serving a serial port's registers
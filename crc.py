@@ -0,0 +1,104 @@
+"""Modbus RTU CRC16 (poly 0xA001 reflected, init 0xFFFF).
+
+Every backend has the signature ``fn(data, crc=0xFFFF) -> int`` and accepts
+the running value of a previous call, so a CRC can be extended as bytes
+arrive. Running the CRC over a whole frame including its two CRC bytes
+yields 0 for a valid frame.
+"""
+import logging
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+CRC_INIT = 0xFFFF
+
+_pack_crc = struct.Struct('<H').pack_into
+
+
+def _build_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xA001 if crc & 1 else 0)
+        table.append(crc)
+    return table
+
+
+_TABLE = _build_table()
+
+
+def crc16_bitwise(data, crc=CRC_INIT):
+    """Reference implementation: one shift per bit."""
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xA001 if crc & 1 else 0)
+    return crc
+
+
+def crc16_table(data, crc=CRC_INIT):
+    """One 256-entry table lookup per byte."""
+    table = _TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+BACKENDS = {
+    "bitwise": crc16_bitwise,
+    "table": crc16_table,
+}
+
+try:
+    # crcmod ships a C extension; without it its pure-Python path is no
+    # faster than the table, so only register it when the extension loads.
+    import crcmod
+    from crcmod import _crcfunext  # noqa: F401
+except ImportError:
+    pass
+else:
+    BACKENDS["crcmod"] = crcmod.mkCrcFun(0x18005, initCrc=CRC_INIT, rev=True, xorOut=0)
+
+DEFAULT_BACKEND = "crcmod" if "crcmod" in BACKENDS else "table"
+
+_backend = BACKENDS[DEFAULT_BACKEND]
+_backend_name = DEFAULT_BACKEND
+
+
+def register_backend(name, func):
+    """Make an additional implementation available to ``set_backend``."""
+    BACKENDS[name] = func
+
+
+def set_backend(name):
+    """Select the implementation used by ``crc16`` and ``calc_crc``."""
+    global _backend, _backend_name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown CRC backend '{name}', available: {', '.join(BACKENDS)}")
+    _backend = BACKENDS[name]
+    _backend_name = name
+    _LOGGER.debug(f"Using CRC backend {name}")
+
+
+def get_backend():
+    return _backend_name
+
+
+def crc16(data, crc=CRC_INIT):
+    """CRC16 of ``data`` as an int, continuing from ``crc``."""
+    return _backend(data, crc)
+
+
+def calc_crc(data):
+    """Calculate Modbus RTU CRC16."""
+    return _backend(data, CRC_INIT).to_bytes(2, 'little')
+
+
+def append_crc(buf, length):
+    """Write the CRC of ``buf[:length]`` into the two bytes that follow it, in place.
+
+    Returns the length of the finished frame.
+    """
+    _pack_crc(buf, length, _backend(memoryview(buf)[:length], CRC_INIT))
+    return length + 2
@@ -0,0 +1,54 @@
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass, config_entry):
+    """Return the entry's register(s) and the live statistics of its bus."""
+    domain_data = hass.data.get(DOMAIN, {})
+    diagnostics = {
+        "data": dict(config_entry.data),
+        "options": dict(config_entry.options),
+    }
+    entry_data = domain_data.get("entries", {}).get(config_entry.entry_id)
+    if entry_data is None:
+        return diagnostics
+
+    bus = entry_data["bus"]
+    if "register_map" in entry_data:
+        rows = [domain_data["entries"][key] for key in entry_data["register_map"]]
+        diagnostics["register_map"] = [_register(row) for row in rows]
+    else:
+        diagnostics["register"] = _register(entry_data)
+    diagnostics["bus"] = {
+        "port": bus.port,
+        "baudrate": bus.baudrate,
+        "entries": len(bus.entry_ids),
+        "registers": len(bus.registers),
+        "slave_ids": sorted(bus.registers.slave_ids),
+        "stats": bus.stats.snapshot(),
+        "response_cache": bus.registers.cache.stats,
+    }
+    if hasattr(bus, "realtime"):
+        diagnostics["bus"]["realtime"] = bus.realtime
+    listener = getattr(bus, "tcp_listener", None)
+    if listener is not None:
+        diagnostics["bus"]["tcp_listener"] = {
+            "port": listener.port,
+            "connections": len(listener.connections),
+            "rejected_connections": listener.rejected_connections,
+        }
+    if hasattr(bus, "connections"):
+        diagnostics["bus"]["connections"] = len(bus.connections)
+        diagnostics["bus"]["rejected_connections"] = bus.rejected_connections
+    diagnostics["write_queue"] = domain_data["writes"].stats
+    return diagnostics
+
+
+def _register(entry_data):
+    return {
+        "slave_id": entry_data["slave_id"],
+        "register_addr": entry_data["register_addr"],
+        "register_type": entry_data.get("register_type"),
+        "data_type": entry_data["codec"].data_type,
+        "registers": entry_data["codec"].registers,
+        "value": entry_data["value"],
+    }
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_WORKERS = 2
+
+
+def _write_key(entry):
+    return (entry.get("serial_port"), entry["slave_id"], entry["register_addr"], entry.get("register_type"))
+
+
+class WriteDispatcher:
+    """Bounded, register-coalescing queue between master writes and HA services.
+
+    The Modbus handler only enqueues and replies; worker tasks drain the
+    queue and call Home Assistant, so a slow integration never holds up the
+    bus. Pending writes are keyed by ``(serial_port, slave_id, register_addr)``: a newer
+    write to a register that has not been dispatched yet replaces the older
+    value, so only the last value is sent. A register is never dispatched by
+    two workers at once, which keeps its calls in order.
+
+    ``dispatch`` may return how many of a batch's writes it skipped as
+    redundant; they are counted in ``skipped``.
+    """
+
+    def __init__(self, hass, dispatch, maxsize=DEFAULT_QUEUE_SIZE, workers=DEFAULT_WORKERS):
+        self._hass = hass
+        self._dispatch = dispatch
+        self.maxsize = maxsize
+        self._worker_count = workers
+        self._pending = {}
+        self._in_flight = set()
+        self._wakeup = asyncio.Event()
+        self._workers = []
+        self.enqueued = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.dispatched = 0
+        self.skipped = 0
+        self.high_water = 0
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    @property
+    def stats(self):
+        return {
+            "depth": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "dispatched": self.dispatched,
+            "skipped": self.skipped,
+        }
+
+    def submit(self, writes):
+        """Queue ``(entry, value)`` pairs; return False, queueing nothing, if they do not fit."""
+        if not writes:
+            return True
+        pending = self._pending
+        new_keys = 0
+        for entry, _ in writes:
+            if _write_key(entry) not in pending:
+                new_keys += 1
+        if len(pending) + new_keys > self.maxsize:
+            self.rejected += len(writes)
+            return False
+        for entry, value in writes:
+            key = _write_key(entry)
+            if key in pending:
+                self.coalesced += 1
+            pending[key] = (entry, value)
+            self.enqueued += 1
+        if len(pending) > self.high_water:
+            self.high_water = len(pending)
+        self._wakeup.set()
+        return True
+
+    def start(self):
+        if self._workers:
+            return
+        for i in range(self._worker_count):
+            name = f"modbus_slave_write_worker_{i}"
+            if hasattr(self._hass, "async_create_background_task"):
+                task = self._hass.async_create_background_task(self._worker(), name=name)
+            else:
+                task = self._hass.async_create_task(self._worker())
+            self._workers.append(task)
+
+    async def stop(self):
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        for task in workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._pending:
+            _LOGGER.debug(f"Dropping {len(self._pending)} pending Modbus write(s)")
+            self._pending.clear()
+
+    def _take_batch(self):
+        """Remove and return every pending write whose register is not in flight."""
+        batch = {}
+        for key in list(self._pending):
+            if key not in self._in_flight:
+                batch[key] = self._pending.pop(key)
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            self._in_flight.update(batch)
+            try:
+                skipped = await self._dispatch(self._hass, list(batch.values()))
+                if skipped:
+                    self.skipped += skipped
+            except Exception as e:
+                _LOGGER.error(f"Error dispatching Modbus writes: {e}")
+            finally:
+                self._in_flight.difference_update(batch)
+                self.dispatched += len(batch)
+                if self._pending:
+                    # Writes that waited on these registers can go now
+                    self._wakeup.set()
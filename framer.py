@@ -0,0 +1,247 @@
+from .crc import CRC_INIT, crc16
+
+MAX_FRAME_SIZE = 256
+MIN_FRAME_SIZE = 4
+BUFFER_SIZE = 4 * MAX_FRAME_SIZE
+
+# USB-serial adapters hand bytes over in batches (FTDI's latency timer
+# defaults to 16 ms), so a single frame can arrive as two chunks separated by
+# more than t3.5. The silence used to cut frames gets this much headroom.
+DEFAULT_GAP_TOLERANCE = 0.01
+
+
+def silence_interval(baudrate):
+    """Return the Modbus RTU t3.5 inter-frame silence in seconds.
+
+    A character is 11 bits on the wire (start, 8 data, parity/2nd stop, stop).
+    Above 19200 baud the spec fixes the interval at 1.75 ms.
+    """
+    if not baudrate or baudrate > 19200:
+        return 0.00175
+    return 3.5 * 11 / baudrate
+
+
+def _candidate_lengths(buf, start, avail):
+    """Return the possible lengths of the frame starting at buf[start].
+
+    Both requests (to any slave) and responses (from other slaves on the same
+    bus) are recognised, so one function code can yield two candidates.
+    A candidate is None while the bytes that determine it have not arrived.
+    Returns an empty tuple for an unknown function code.
+    """
+    func = buf[start + 1]
+    if func & 0x80:
+        return (5,)  # exception response
+    if func in (1, 2, 3, 4):
+        return (8, 5 + buf[start + 2] if avail > 2 else None)
+    if func in (5, 6, 8):
+        return (8,)
+    if func in (15, 16):
+        return (8, 9 + buf[start + 6] if avail > 6 else None)
+    if func == 22:
+        return (10,)
+    if func == 23:
+        return (
+            13 + buf[start + 10] if avail > 10 else None,
+            5 + buf[start + 2] if avail > 2 else None,
+        )
+    if func == 7:
+        return (4, 5)
+    if func == 11:
+        return (4, 8)
+    if func in (12, 17):
+        return (4, 5 + buf[start + 2] if avail > 2 else None)
+    if func in (20, 21):
+        return (5 + buf[start + 2] if avail > 2 else None,)
+    if func == 24:
+        return (6,)
+    if func == 43:
+        return (7,)  # MEI read device identification request
+    return ()
+
+
+class RtuFramer:
+    """Incremental Modbus RTU framer.
+
+    Bytes are appended to a fixed ``bytearray``; the consumed prefix is only
+    moved when the tail runs out of room, so resyncing on noise is an index
+    increment rather than a copy. Frame boundaries come from the function
+    code (including byte-count driven FC15/16/23 lengths) and are confirmed by
+    CRC. A silence longer than t3.5 ends whatever is pending: it is emitted if
+    its CRC checks out (unknown function codes) and discarded otherwise.
+    """
+
+    def __init__(self, baudrate, gap_tolerance=DEFAULT_GAP_TOLERANCE):
+        self.t35 = silence_interval(baudrate)
+        self.gap = self.t35 + gap_tolerance
+        # Frames for slave IDs outside this container are skipped without
+        # being copied out of the buffer; None accepts every slave.
+        self.slave_ids = None
+        # (slave_id, function) -> frames skipped that way, for the bus stats
+        self.other_slaves = {}
+        self._buf = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        self._last_rx = None
+        # Running CRC over buf[_crc_start:_crc_stop], extended as bytes arrive
+        self._crc_start = -1
+        self._crc_stop = 0
+        self._crc = CRC_INIT
+        # Garbage runs that failed CRC; sliding through one run counts once
+        self.crc_errors = 0
+        self._resyncing = False
+        # _skip_to_next_frame found nothing from _skip_from in buf[:_skip_checked]
+        self._skip_from = -1
+        self._skip_checked = 0
+
+    @property
+    def pending(self):
+        """Number of buffered bytes not yet assigned to a frame."""
+        return self._end - self._start
+
+    def reset(self):
+        self._start = self._end = 0
+        self._crc_start = -1
+        self._resyncing = False
+        self._skip_from = -1
+
+    def _frame_crc(self, start, stop):
+        """CRC of buf[start:stop], reusing the running CRC of the current frame.
+
+        While a frame trickles in over several reads, or when a function code
+        has two candidate lengths, each byte is only folded in once.
+        """
+        if start != self._crc_start or stop < self._crc_stop:
+            self._crc_start = self._crc_stop = start
+            self._crc = CRC_INIT
+        if stop > self._crc_stop:
+            self._crc = crc16(self._view[self._crc_stop:stop], self._crc)
+            self._crc_stop = stop
+        return self._crc
+
+    def _append(self, data):
+        size = len(data)
+        if self._end + size > BUFFER_SIZE:
+            pending = self._end - self._start
+            if pending + size > BUFFER_SIZE:
+                # Garbage that never framed; keep only the newest bytes
+                keep = max(0, BUFFER_SIZE - size)
+                self._start = self._end - min(pending, keep)
+                pending = self._end - self._start
+                if size > BUFFER_SIZE:
+                    data = data[-BUFFER_SIZE:]
+                    size = BUFFER_SIZE
+            self._buf[0:pending] = self._buf[self._start:self._end]
+            self._crc_start = -1
+            self._skip_from = -1
+            self._start = 0
+            self._end = pending
+        self._buf[self._end:self._end + size] = data
+        self._end += size
+
+    def _emit(self, frames, start, length):
+        slave_ids = self.slave_ids
+        if slave_ids is None or self._buf[start] in slave_ids:
+            frames.append(bytes(self._view[start:start + length]))
+            return
+        key = (self._buf[start], self._buf[start + 1])
+        other_slaves = self.other_slaves
+        other_slaves[key] = other_slaves.get(key, 0) + 1
+
+    def feed(self, data, now):
+        """Add received bytes; return the complete frames found, oldest first.
+
+        ``now`` is the loop time the bytes were received. Calling with empty
+        ``data`` once the line has been silent for ``gap`` seconds closes any
+        pending partial frame.
+        """
+        frames = []
+        if self._end != self._start and self._last_rx is not None and now - self._last_rx > self.gap:
+            self._scan(frames, True)
+        if data:
+            self._last_rx = now
+            self._append(data)
+            self._scan(frames, False)
+        return frames
+
+    def _scan(self, frames, final):
+        """Cut frames from the buffer.
+
+        With ``final`` set the line has gone silent, so no further bytes will
+        complete a pending frame: lengths that need more data count as misses,
+        and an unknown function code ends at the last buffered byte.
+        """
+        buf = self._buf
+        while True:
+            start = self._start
+            avail = self._end - start
+            if avail < MIN_FRAME_SIZE:
+                break
+            candidates = _candidate_lengths(buf, start, avail)
+            if not candidates:
+                if final:
+                    candidates = (avail,)
+                elif self._skip_to_next_frame(start + 1):
+                    continue
+                else:
+                    # Unknown function code: only the next silence can end it
+                    break
+            need_more = False
+            matched = 0
+            for length in candidates:
+                if length is None or length > avail:
+                    need_more = True
+                    continue
+                if length > MAX_FRAME_SIZE:
+                    continue
+                if self._frame_crc(start, start + length) == 0:
+                    matched = length
+                    break
+            if matched:
+                self._emit(frames, start, matched)
+                self._start = start + matched
+                self._resyncing = False
+            elif need_more and not final:
+                # Noise can start like a known request; a complete frame
+                # behind it is cut now instead of after the next silence
+                if self._skip_to_next_frame(start + 1):
+                    continue
+                break
+            else:
+                # Line noise or mid-frame start: slide one byte and retry
+                self._count_crc_error()
+                self._start = start + 1
+        if final or self._start == self._end:
+            self.reset()
+
+    def _count_crc_error(self):
+        if not self._resyncing:
+            self.crc_errors += 1
+            self._resyncing = True
+
+    def _skip_to_next_frame(self, offset):
+        """Drop bytes up to the next complete, CRC-valid frame after ``offset``.
+
+        Lets noise that looks like an unknown function code, or like the
+        start of a frame that never completes, be skipped without waiting
+        for the line to go quiet. Frames that fit in the buffer at the last
+        unsuccessful try from the same ``offset`` are not checked again, so
+        a long frame trickling in costs each candidate one CRC.
+        """
+        buf = self._buf
+        view = self._view
+        end = self._end
+        checked = self._skip_checked if self._skip_from == offset else 0
+        for start in range(offset, end - MIN_FRAME_SIZE + 1):
+            avail = end - start
+            for length in _candidate_lengths(buf, start, avail):
+                if length is not None and checked < start + length <= end and length <= MAX_FRAME_SIZE:
+                    if crc16(view[start:start + length]) == 0:
+                        self._count_crc_error()
+                        self._start = start
+                        self._skip_from = -1
+                        return True
+        self._skip_from = offset
+        self._skip_checked = end
+        return False
@@ -0,0 +1,90 @@
+import time
+
+from .traffic import HA_UPDATE
+
+
+class UpdateLimits:
+    """Deadband and rate limits for the values a register's source pushes, compiled once per entry.
+
+    ``deadband`` is in source units (before scaling) and
+    ``deadband_percent`` is relative to the register's current value; a new
+    value is written only when it moves past both. ``min_interval`` is the
+    least time between two writes: a value arriving sooner is held and
+    written when the interval is over. ``max_staleness`` bounds how long a
+    value held back by the deadband can go unwritten. Times are in seconds;
+    0 turns a limit off. The first value is always written.
+    """
+
+    __slots__ = (
+        "deadband", "deadband_percent", "min_interval", "max_staleness",
+        "_threshold", "_last_write", "_pending", "_timer", "_deadline",
+    )
+
+    def __init__(self, deadband=0, deadband_percent=0, min_interval=0, max_staleness=0, multiplier=1):
+        self.deadband = deadband
+        self.deadband_percent = deadband_percent
+        self.min_interval = min_interval
+        self.max_staleness = max_staleness
+        # Encoded values are compared, so the deadband is scaled like them
+        self._threshold = deadband * multiplier
+        self._last_write = None
+        self._pending = None
+        self._timer = None
+        self._deadline = None
+
+    def offer(self, hass, entry, value, force=False):
+        """Write ``value`` to the entry's register now, later or not at all; return True if written now."""
+        current = entry["value"]
+        if value == current:
+            # Back where the register already is; nothing held back is worth writing
+            self.cancel()
+            return False
+        now = time.monotonic()
+        # The first value from the source is always written
+        if not force and self._last_write is not None:
+            since = now - self._last_write
+            stale = self.max_staleness and since >= self.max_staleness
+            if not stale and self._within_deadband(current, value):
+                self._pending = value
+                if self.max_staleness:
+                    self._schedule(hass, entry, now, self._last_write + self.max_staleness)
+                return False
+            if self.min_interval and since < self.min_interval:
+                self._pending = value
+                self._schedule(hass, entry, now, self._last_write + self.min_interval)
+                return False
+        self._write(entry, value, now)
+        return True
+
+    def cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._deadline = None
+        self._pending = None
+
+    def _within_deadband(self, current, value):
+        change = abs(value - current)
+        if change < self._threshold:
+            return True
+        return bool(self.deadband_percent) and change < abs(current) * self.deadband_percent / 100
+
+    def _schedule(self, hass, entry, now, deadline):
+        if self._timer is not None:
+            if self._deadline <= deadline:
+                return
+            self._timer.cancel()
+        self._deadline = deadline
+        self._timer = hass.loop.call_later(max(deadline - now, 0), self._flush, entry)
+
+    def _flush(self, entry):
+        self._timer = None
+        self._deadline = None
+        if self._pending is not None:
+            self._write(entry, self._pending, time.monotonic())
+            entry["bus"].traffic.record(entry["slave_id"], HA_UPDATE, entry["register_addr"])
+
+    def _write(self, entry, value, now):
+        self.cancel()
+        self._last_write = now
+        entry["bus"].registers.set_value(entry, value)
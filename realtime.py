@@ -0,0 +1,169 @@
+import asyncio
+import collections
+import logging
+import threading
+import time
+
+from .crc import append_crc
+from .framer import MAX_FRAME_SIZE, RtuFramer
+from .serial_io import SerialStream
+
+_LOGGER = logging.getLogger(__name__)
+
+# Requests answered in the I/O thread; they only read the register images
+READ_FUNCTIONS = frozenset((1, 2, 3, 4))
+# Seconds to wait for the I/O thread when the bus closes
+STOP_TIMEOUT = 5
+
+
+class RealtimeResponder:
+    """Serves one serial bus from a thread with its own event loop.
+
+    Framing, lookup and the reply to every read happen in the thread, so
+    reply latency does not depend on how busy Home Assistant's loop is.
+    Reads copy straight from the bus's register images, checked against
+    ``RegisterIndex.version`` instead of a lock, and skip the response
+    cache, which belongs to the Home Assistant loop.
+
+    Anything else, writes included, is handed to ``hand_over(frame,
+    received)`` on Home Assistant's loop, which answers through ``send``.
+    Counters for the reads go into a deque that ``drain`` empties on that
+    loop, so the bus's stats and traffic summary are only ever touched
+    from there.
+    """
+
+    def __init__(self, bus, answer_read, hand_over, loop):
+        self._bus = bus
+        self._answer_read = answer_read
+        self._hand_over = hand_over
+        self._hass_loop = loop
+        self._records = collections.deque()
+        # Frames the thread's framer skipped for other slaves, one dict per batch
+        self._other_slaves = collections.deque()
+        self.crc_errors = 0
+        self._crc_errors_drained = 0
+        self._loop = None
+        # Held while the thread's loop closes, so ``send`` never schedules onto a closed loop
+        self._loop_lock = threading.Lock()
+        self._task = None
+        self._thread = None
+        self._stream = None
+
+    def start(self):
+        """Start the I/O thread."""
+        loop = self._loop = asyncio.new_event_loop()
+        self._task = loop.create_task(self._serve())
+        self._thread = threading.Thread(target=self._run, name=f"modbus_slave {self._bus.port}", daemon=True)
+        self._thread.start()
+        _LOGGER.info(f"Started real-time I/O thread for {self._bus.port}")
+
+    def stop(self):
+        """Stop the I/O thread and wait for it; blocks, so run it in the executor."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(STOP_TIMEOUT)
+        if self._thread.is_alive():
+            _LOGGER.warning(f"Real-time I/O thread for {self._bus.port} did not stop in {STOP_TIMEOUT}s")
+        self._thread = None
+
+    def send(self, data):
+        """Send a reply built on Home Assistant's loop; ``data`` must not be reused.
+
+        Replies for a thread that has stopped are dropped.
+        """
+        with self._loop_lock:
+            if self._loop.is_closed():
+                _LOGGER.debug("Dropping reply on %s: real-time I/O thread stopped", self._bus.port)
+                return
+            self._loop.call_soon_threadsafe(self._write, data)
+
+    def _write(self, data):
+        if self._stream is not None:
+            self._stream.write(data)
+
+    def drain(self):
+        """Move the counters of the reads answered so far into the bus's stats; call from Home Assistant's loop."""
+        records = self._records
+        stats = self._bus.stats
+        traffic = self._bus.traffic
+        while records:
+            frame, reply_function, reply_code, latency = records.popleft()
+            traffic.record_request(frame)
+            stats.record(frame[0], frame[1], reply_function, latency, reply_code)
+        other_slaves = self._other_slaves
+        while other_slaves:
+            stats.record_other_slaves(other_slaves.popleft())
+        crc_errors = self.crc_errors
+        if crc_errors != self._crc_errors_drained:
+            stats.crc_errors += crc_errors - self._crc_errors_drained
+            self._crc_errors_drained = crc_errors
+
+    def _run(self):
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            with self._loop_lock:
+                loop.close()
+            _LOGGER.info(f"Real-time I/O thread for {self._bus.port} stopped")
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        stream = self._stream = SerialStream(self._bus.serial_connection, loop)
+        framer = RtuFramer(self._bus.baudrate)
+        framer.slave_ids = self._bus.registers.slave_ids
+        out = bytearray(MAX_FRAME_SIZE)
+        try:
+            while True:
+                try:
+                    data = await stream.read(framer.gap if framer.pending else None)
+                    now = stream.last_rx_time if data else loop.time()
+                    for frame in framer.feed(data, now):
+                        if frame[1] in READ_FUNCTIONS:
+                            self._answer(frame, out, stream.last_rx_time)
+                        else:
+                            self._hass_loop.call_soon_threadsafe(self._hand_over, frame, stream.last_rx_time)
+                    if framer.crc_errors:
+                        self.crc_errors += framer.crc_errors
+                        framer.crc_errors = 0
+                    if framer.other_slaves:
+                        self._other_slaves.append(framer.other_slaves)
+                        framer.other_slaves = {}
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    _LOGGER.error(f"Error in real-time I/O thread for {self._bus.port}: {e}")
+                    framer.reset()
+                    await asyncio.sleep(1)
+        finally:
+            self._stream = None
+            stream.close()
+
+    def _answer(self, frame, out, received):
+        """Reply to a read from a consistent copy of the registers."""
+        registers = self._bus.registers
+        request = frame[:-2]
+        while True:
+            version = registers.version
+            if version & 1:
+                # Give the loop thread the GIL to finish its change
+                time.sleep(0)
+                continue
+            try:
+                length = self._answer_read(request, out)
+            except Exception:
+                if registers.version == version:
+                    raise
+                continue  # Read half way through a mapping change
+            if registers.version == version:
+                break
+        if not length:
+            self._records.append((frame, None, 0, 0))
+            return
+        length = append_crc(out, length)
+        self._stream.write(memoryview(out)[:length])
+        self._records.append((frame, out[1], out[2], self._loop.time() - received))
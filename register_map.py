@@ -0,0 +1,201 @@
+import csv
+import io
+import json
+
+import yaml
+
+from .codec import DATA_TYPES, DEFAULT_DATA_TYPE
+from .const import (
+    CONF_BYTE_ORDER,
+    CONF_DATA_TYPE,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_DIRECTION,
+    CONF_MAX_STALENESS,
+    CONF_MIN_INTERVAL,
+    CONF_READ_ATTRIBUTE,
+    CONF_READ_ENTITY,
+    CONF_READ_MODE,
+    CONF_REGISTER_ADDR,
+    CONF_REGISTER_TYPE,
+    CONF_SCALE,
+    CONF_SLAVE_ID,
+    CONF_TEMPLATE,
+    CONF_VALUE_MAP,
+    CONF_WORD_ORDER,
+    CONF_WRITE_ENTITY,
+    CONF_WRITE_PAYLOAD,
+    CONF_WRITE_SERVICE,
+)
+from .registers import BIT_TABLES, REGISTER_COUNT, REGISTER_HOLDING
+
+REGISTER_TYPES = (REGISTER_HOLDING,) + BIT_TABLES
+ORDERS = ("big", "little")
+DIRECTIONS = ("write_only", "write_read")
+MAP_FILE_EXTENSIONS = (".csv", ".json", ".yaml", ".yml")
+
+# Column name -> config key; several spellings are accepted for the common columns
+COLUMNS = {
+    "address": CONF_REGISTER_ADDR,
+    "register": CONF_REGISTER_ADDR,
+    "register_addr": CONF_REGISTER_ADDR,
+    "type": CONF_REGISTER_TYPE,
+    "register_type": CONF_REGISTER_TYPE,
+    "data_type": CONF_DATA_TYPE,
+    "word_order": CONF_WORD_ORDER,
+    "byte_order": CONF_BYTE_ORDER,
+    "slave": CONF_SLAVE_ID,
+    "slave_id": CONF_SLAVE_ID,
+    "entity": CONF_READ_ENTITY,
+    "read_entity": CONF_READ_ENTITY,
+    "attribute": CONF_READ_ATTRIBUTE,
+    "read_attribute": CONF_READ_ATTRIBUTE,
+    "scale": CONF_SCALE,
+    "map": CONF_VALUE_MAP,
+    "value_map": CONF_VALUE_MAP,
+    "template": CONF_TEMPLATE,
+    "direction": CONF_DIRECTION,
+    "write_service": CONF_WRITE_SERVICE,
+    "service": CONF_WRITE_SERVICE,
+    "write_entity": CONF_WRITE_ENTITY,
+    "write_payload": CONF_WRITE_PAYLOAD,
+    "payload": CONF_WRITE_PAYLOAD,
+    "deadband": CONF_DEADBAND,
+    "deadband_percent": CONF_DEADBAND_PERCENT,
+    "min_interval": CONF_MIN_INTERVAL,
+    "max_staleness": CONF_MAX_STALENESS,
+}
+LIMITS = (CONF_DEADBAND, CONF_DEADBAND_PERCENT, CONF_MIN_INTERVAL, CONF_MAX_STALENESS)
+
+
+class RegisterMapError(ValueError):
+    """A register map that cannot be parsed, or a row that does not validate."""
+
+
+def parse_register_map(text, default_slave_id):
+    """Parse and validate a CSV, JSON or YAML register table in one pass.
+
+    Returns one dict per row, keyed like a single-register entry's config
+    data, ready to store in the config entry. Raises ``RegisterMapError``
+    naming the first bad row.
+    """
+    rows = _load_rows(text)
+    if not rows:
+        raise RegisterMapError("the register map is empty")
+    parsed = []
+    claimed = {}
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise RegisterMapError(f"row {number}: expected a mapping of column to value")
+        try:
+            data = _parse_row(row, default_slave_id)
+        except (TypeError, ValueError) as e:
+            raise RegisterMapError(f"row {number}: {e}") from None
+        table = data[CONF_REGISTER_TYPE]
+        count = 1 if table in BIT_TABLES else DATA_TYPES[data[CONF_DATA_TYPE]][1]
+        for register_addr in range(data[CONF_REGISTER_ADDR], data[CONF_REGISTER_ADDR] + count):
+            key = (data[CONF_SLAVE_ID], table, register_addr)
+            if key in claimed:
+                raise RegisterMapError(f"row {number}: {table} register {register_addr} is already used by row {claimed[key]}")
+            claimed[key] = number
+        parsed.append(data)
+    return parsed
+
+
+def _load_rows(text):
+    text = text.strip()
+    if not text:
+        return []
+    try:
+        if text[0] in "[{":
+            rows = json.loads(text)
+        elif text.startswith("-") or ":" in text.splitlines()[0]:
+            rows = yaml.safe_load(text)
+        else:
+            return list(csv.DictReader(io.StringIO(text), skipinitialspace=True))
+    except (ValueError, yaml.YAMLError) as e:
+        raise RegisterMapError(f"cannot parse the register map: {e}") from None
+    if isinstance(rows, dict):
+        # {"registers": [...]} as well as a bare list
+        rows = rows.get("registers")
+    if not isinstance(rows, list):
+        raise RegisterMapError("the register map must be a list of rows")
+    return rows
+
+
+def _parse_row(row, default_slave_id):
+    values = {}
+    for column, value in row.items():
+        key = COLUMNS.get(str(column).strip().lower())
+        if key is None:
+            raise ValueError(f"unknown column '{column}'")
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ""):
+            values[key] = value
+
+    if CONF_REGISTER_ADDR not in values:
+        raise ValueError("address is required")
+    register_addr = int(values[CONF_REGISTER_ADDR])
+    if not 0 <= register_addr < REGISTER_COUNT:
+        raise ValueError(f"address {register_addr} is out of range")
+    slave_id = int(values.get(CONF_SLAVE_ID, default_slave_id))
+    if not 1 <= slave_id <= 247:
+        raise ValueError(f"slave ID {slave_id} is out of range")
+    table = values.get(CONF_REGISTER_TYPE, REGISTER_HOLDING)
+    if table not in REGISTER_TYPES:
+        raise ValueError(f"type must be one of {', '.join(REGISTER_TYPES)}")
+    data_type = values.get(CONF_DATA_TYPE, DEFAULT_DATA_TYPE)
+    if data_type not in DATA_TYPES:
+        raise ValueError(f"data_type must be one of {', '.join(DATA_TYPES)}")
+    if register_addr + (1 if table in BIT_TABLES else DATA_TYPES[data_type][1]) > REGISTER_COUNT:
+        raise ValueError(f"{data_type} does not fit at address {register_addr}")
+    for key in (CONF_WORD_ORDER, CONF_BYTE_ORDER):
+        if values.get(key, "big") not in ORDERS:
+            raise ValueError(f"{key} must be big or little")
+    scale = int(values.get(CONF_SCALE, 1))
+    if scale < 1:
+        raise ValueError("scale must be 1 or more")
+    value_map = values.get(CONF_VALUE_MAP)
+    if isinstance(value_map, str):
+        value_map = json.loads(value_map)
+    if value_map is not None and not isinstance(value_map, dict):
+        raise ValueError("map must be a JSON object")
+    write_payload = values.get(CONF_WRITE_PAYLOAD, "")
+    if isinstance(write_payload, dict):
+        write_payload = json.dumps(write_payload)
+    write_service = values.get(CONF_WRITE_SERVICE, "")
+    if write_service and "." not in write_service:
+        raise ValueError("write_service must be in form 'domain.service'")
+    direction = values.get(CONF_DIRECTION, "write_read" if write_service else "write_only")
+    if direction not in DIRECTIONS:
+        raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+    read_entity = values.get(CONF_READ_ENTITY, "")
+    if read_entity and "." not in read_entity:
+        raise ValueError(f"'{read_entity}' is not an entity ID")
+    limits = {}
+    for key in LIMITS:
+        if key in values:
+            limits[key] = float(values[key])
+            if limits[key] < 0:
+                raise ValueError(f"{key} must not be negative")
+
+    return {
+        CONF_SLAVE_ID: slave_id,
+        CONF_REGISTER_ADDR: register_addr,
+        CONF_REGISTER_TYPE: table,
+        CONF_DATA_TYPE: data_type,
+        CONF_WORD_ORDER: values.get(CONF_WORD_ORDER, "big"),
+        CONF_BYTE_ORDER: values.get(CONF_BYTE_ORDER, "big"),
+        CONF_READ_MODE: "entity" if read_entity else "template",
+        CONF_READ_ENTITY: read_entity,
+        CONF_READ_ATTRIBUTE: values.get(CONF_READ_ATTRIBUTE, ""),
+        CONF_TEMPLATE: values.get(CONF_TEMPLATE, ""),
+        CONF_SCALE: scale,
+        CONF_VALUE_MAP: value_map or {},
+        CONF_DIRECTION: direction,
+        CONF_WRITE_SERVICE: write_service,
+        CONF_WRITE_ENTITY: values.get(CONF_WRITE_ENTITY, ""),
+        CONF_WRITE_PAYLOAD: write_payload,
+        **limits,
+    }
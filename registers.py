@@ -0,0 +1,277 @@
+import logging
+import struct
+
+from .response_cache import ResponseCache
+
+_LOGGER = logging.getLogger(__name__)
+
+REGISTER_COUNT = 65536
+MAX_READ_REGISTERS = 125
+MAX_WRITE_REGISTERS = 123
+MAX_READ_BITS = 2000
+MAX_WRITE_BITS = 1968
+
+# Tables an entry can live in; input registers (FC4) read the holding table
+REGISTER_HOLDING = "holding"
+REGISTER_COIL = "coil"
+REGISTER_DISCRETE_INPUT = "discrete_input"
+BIT_TABLES = (REGISTER_COIL, REGISTER_DISCRETE_INPUT)
+
+UNMAPPED_ZERO_FILL = "zero_fill"
+UNMAPPED_EXCEPTION = "exception"
+
+_register = struct.Struct('>H')
+
+
+def _to_word(value):
+    """Clamp a register value to what 16 bits can carry (signed or unsigned)."""
+    value = int(value)
+    if value < -32768:
+        value = -32768
+    elif value > 65535:
+        value = 65535
+    return value & 0xFFFF
+
+
+class RegisterIndex:
+    """Registers keyed by ``(slave_id, register_addr, table)`` for O(1) lookup.
+
+    Each slave also gets a packed image per table. Holding registers are
+    65536 big-endian words in one ``bytearray``, so a block read is a single
+    slice that is already in wire order. Coils and discrete inputs are
+    65536 bits packed LSB first, eight to a byte, the order FC1/FC2 send
+    them in. A parallel ``bytearray`` per table flags which addresses are
+    backed by an entry. An entry whose data type spans several registers
+    is indexed, and packed into the image, at each of them.
+
+    When two entries claim the same address the one added first keeps
+    serving it; the other is held back and takes over if the first one is
+    removed.
+
+    The unmapped policy applies to a whole slave: it is ``exception`` while
+    any of the slave's entries asks for it, whatever order they load in.
+
+    ``cache`` holds encoded read replies; the index invalidates them
+    whenever a word in the image or a slave's mapping changes. The
+    ``on_change`` callable, if set, is called after any write that changes
+    the image.
+
+    The index is only changed from the event loop. ``version`` is odd
+    while a change is under way, so a reader in another thread can copy
+    from the images without a lock: it reads ``version``, copies, and
+    retries if ``version`` was odd or has moved since.
+    """
+
+    def __init__(self):
+        self._by_addr = {}
+        self._addr_of = {}
+        # slave_id -> number of registers; usable as a membership filter
+        self.slave_ids = {}
+        self._images = {}
+        self._mapped = {}
+        # slave_id -> number of its entries with the exception policy
+        self._strict = {}
+        self.cache = ResponseCache()
+        self.on_change = None
+        self.version = 0
+
+    def _image(self, slave_id, table):
+        key = (slave_id, table)
+        image = self._images.get(key)
+        if image is None:
+            size = REGISTER_COUNT // 8 if table in BIT_TABLES else 2 * REGISTER_COUNT
+            image = self._images[key] = bytearray(size)
+            self._mapped[key] = bytearray(REGISTER_COUNT)
+        return image
+
+    def _span(self, entry):
+        """The entry's table and the addresses it occupies: one bit, or the registers of its data type."""
+        table = entry.get("register_type") or REGISTER_HOLDING
+        register_addr = entry["register_addr"]
+        codec = entry.get("codec")
+        count = codec.registers if codec is not None and table not in BIT_TABLES else 1
+        return table, range(register_addr, min(register_addr + count, REGISTER_COUNT))
+
+    def _encode(self, entry, value):
+        codec = entry.get("codec")
+        if codec is None:
+            return _register.pack(_to_word(value))
+        return codec.pack(value)
+
+    def _store(self, image, table, register_addr, data):
+        """Write one bit, or the register ``data`` holds, into an image; return True if it changed."""
+        if table in BIT_TABLES:
+            index = register_addr >> 3
+            mask = 1 << (register_addr & 7)
+            if bool(image[index] & mask) == bool(data):
+                return False
+            image[index] ^= mask
+            return True
+        start = 2 * register_addr
+        if image[start:start + 2] == data:
+            return False
+        image[start:start + 2] = data
+        return True
+
+    def _write(self, entry, slave_id, table, span, value):
+        """Store ``value`` at the addresses of ``span`` that ``entry`` serves, dropping stale replies."""
+        image = self._images.get((slave_id, table))
+        if image is None:
+            return
+        by_addr = self._by_addr
+        data = value if table in BIT_TABLES else self._encode(entry, value)
+        changed = False
+        # add() and remove() already hold the version odd around their writes
+        outermost = not self.version & 1
+        if outermost:
+            self.version += 1
+        for i, register_addr in enumerate(span):
+            claims = by_addr.get((slave_id, register_addr, table))
+            if not claims or claims[0][1] is not entry:
+                continue
+            word = data if table in BIT_TABLES else data[2 * i:2 * i + 2]
+            if self._store(image, table, register_addr, word):
+                self.cache.invalidate(slave_id, register_addr)
+                changed = True
+        if outermost:
+            self.version += 1
+        if changed and self.on_change is not None:
+            self.on_change()
+
+    def add(self, entry_id, entry):
+        """Index ``entry`` under its slave/register(s)/table; return True if it overlaps another entry."""
+        self.remove(entry_id)
+        slave_id = entry["slave_id"]
+        table, span = self._span(entry)
+        self.version += 1
+        self._image(slave_id, table)
+        mapped = self._mapped[(slave_id, table)]
+        duplicate = False
+        for register_addr in span:
+            claims = self._by_addr.setdefault((slave_id, register_addr, table), [])
+            if claims and not duplicate:
+                duplicate = True
+                _LOGGER.warning(
+                    f"Duplicate register detected: Slave {slave_id} Reg {register_addr} ({table}) already exists in entry {claims[0][0]}; "
+                    f"entry {entry_id} will not be served there until it is removed"
+                )
+            claims.append((entry_id, entry))
+            mapped[register_addr] = 1
+        strict = entry.get("unmapped_policy") == UNMAPPED_EXCEPTION
+        self._addr_of[entry_id] = (slave_id, table, span, strict)
+        self.cache.invalidate_slave(slave_id)
+        self.slave_ids[slave_id] = self.slave_ids.get(slave_id, 0) + 1
+        if strict:
+            self._strict[slave_id] = self._strict.get(slave_id, 0) + 1
+        self._write(entry, slave_id, table, span, entry.get("value", 0))
+        self.version += 1
+        return duplicate
+
+    def remove(self, entry_id):
+        located = self._addr_of.pop(entry_id, None)
+        if located is None:
+            return
+        slave_id, table, span, strict = located
+        self.version += 1
+        self.cache.invalidate_slave(slave_id)
+        image = self._images[(slave_id, table)]
+        for register_addr in span:
+            key = (slave_id, register_addr, table)
+            claims = self._by_addr[key]
+            was_active = claims[0][0] == entry_id
+            claims[:] = [claim for claim in claims if claim[0] != entry_id]
+            if not claims:
+                del self._by_addr[key]
+                self._mapped[(slave_id, table)][register_addr] = 0
+                self._store(image, table, register_addr, 0 if table in BIT_TABLES else bytes(2))
+            elif was_active:
+                # The next claimant takes over the address with its own value
+                successor = claims[0][1]
+                self._write(successor, slave_id, table, self._span(successor)[1], successor.get("value", 0))
+        if strict:
+            strict_remaining = self._strict[slave_id] - 1
+            if strict_remaining:
+                self._strict[slave_id] = strict_remaining
+            else:
+                del self._strict[slave_id]
+        remaining = self.slave_ids[slave_id] - 1
+        if remaining:
+            self.slave_ids[slave_id] = remaining
+        else:
+            del self.slave_ids[slave_id]
+            for key in [key for key in self._images if key[0] == slave_id]:
+                del self._images[key]
+                del self._mapped[key]
+        self.version += 1
+
+    def get(self, slave_id, register_addr, table=REGISTER_HOLDING):
+        """Return the entry serving the address, or None."""
+        claims = self._by_addr.get((slave_id, register_addr, table))
+        return claims[0][1] if claims else None
+
+    def set_value(self, entry, value):
+        """Store a new value on ``entry`` and, where it is serving, in the image."""
+        entry["value"] = value
+        table, span = self._span(entry)
+        self._write(entry, entry["slave_id"], table, span, value)
+
+    def words(self):
+        """Yield ``(slave_id, table, register_addr, word)`` for every mapped address; bits give 0 or 1."""
+        images = self._images
+        for slave_id, register_addr, table in self._by_addr:
+            image = images[(slave_id, table)]
+            if table in BIT_TABLES:
+                yield slave_id, table, register_addr, (image[register_addr >> 3] >> (register_addr & 7)) & 1
+            else:
+                yield slave_id, table, register_addr, _register.unpack_from(image, 2 * register_addr)[0]
+
+    def unmapped_policy(self, slave_id):
+        return UNMAPPED_EXCEPTION if slave_id in self._strict else UNMAPPED_ZERO_FILL
+
+    def _readable(self, slave_id, register_addr, end, table=REGISTER_HOLDING):
+        mapped = self._mapped.get((slave_id, table))
+        if mapped is None:
+            return False
+        if mapped.find(1, register_addr, end) == -1:
+            return False
+        if slave_id in self._strict and mapped.find(0, register_addr, end) != -1:
+            return False
+        return True
+
+    def read_into(self, slave_id, register_addr, count, out, offset):
+        """Copy ``count`` registers into ``out`` at ``offset`` as big-endian bytes.
+
+        Unmapped addresses read as zero. Returns False, leaving ``out``
+        untouched, when the slave has nothing mapped in the range, or when
+        part of it is unmapped and the slave's policy is ``exception``.
+        """
+        end = register_addr + count
+        if not self._readable(slave_id, register_addr, end):
+            return False
+        out[offset:offset + 2 * count] = memoryview(self._images[(slave_id, REGISTER_HOLDING)])[2 * register_addr:2 * end]
+        return True
+
+    def read_bits_into(self, slave_id, table, register_addr, count, out, offset):
+        """Copy ``count`` coils or discrete inputs into ``out`` at ``offset``, packed as FC1/FC2 send them.
+
+        Follows the same unmapped rules as ``read_into``.
+        """
+        end = register_addr + count
+        if not self._readable(slave_id, register_addr, end, table):
+            return False
+        image = self._images[(slave_id, table)]
+        size = (count + 7) >> 3
+        first = register_addr >> 3
+        shift = register_addr & 7
+        if shift:
+            bits = int.from_bytes(image[first:(end + 7) >> 3], 'little') >> shift
+            out[offset:offset + size] = (bits & ((1 << count) - 1)).to_bytes(size, 'little')
+            return True
+        # Byte aligned: the image is already in wire order
+        out[offset:offset + size] = memoryview(image)[first:first + size]
+        if count & 7:
+            out[offset + size - 1] &= (1 << (count & 7)) - 1
+        return True
+
+    def __len__(self):
+        return len(self._by_addr)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 128
+
+
+class ResponseCache:
+    """LRU of encoded replies, keyed by the request that produced them.
+
+    The key is the request as the handler received it (slave id, function,
+    address and quantity, plus the CRC on RTU framings), and the value is
+    the reply exactly as it goes out, so a repeated poll, or a repeated
+    request that fails with an exception, is answered with a dict lookup and
+    a write. Entries are dropped as soon as a register in their range
+    changes (``invalidate``) or the slave's mapping changes
+    (``invalidate_slave``).
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._responses = OrderedDict()
+        # slave_id -> {request: (first register, end register)}
+        self._ranges = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    @property
+    def stats(self):
+        return {
+            "size": len(self._responses),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    def get(self, request):
+        response = self._responses.get(request)
+        if response is None:
+            self.misses += 1
+            return None
+        self._responses.move_to_end(request)
+        self.hits += 1
+        return response
+
+    def put(self, request, response):
+        """Remember ``response`` for ``request`` (slave, function, address, quantity, ...)."""
+        if self.maxsize <= 0:
+            return
+        responses = self._responses
+        if request in responses:
+            responses.move_to_end(request)
+        elif len(responses) >= self.maxsize:
+            self._drop(next(iter(responses)))
+        responses[request] = response
+        if len(request) >= 6:
+            first = (request[2] << 8) | request[3]
+            end = first + ((request[4] << 8) | request[5])
+        else:
+            # Too short to name registers; only a mapping change drops it
+            first = end = 0
+        self._ranges.setdefault(request[0], {})[request] = (first, end)
+
+    def _drop(self, request):
+        del self._responses[request]
+        ranges = self._ranges[request[0]]
+        del ranges[request]
+        if not ranges:
+            del self._ranges[request[0]]
+
+    def invalidate(self, slave_id, register_addr):
+        """Forget every reply whose range covers ``register_addr``."""
+        ranges = self._ranges.get(slave_id)
+        if not ranges:
+            return
+        stale = [request for request, (first, end) in ranges.items() if first <= register_addr < end]
+        for request in stale:
+            self._drop(request)
+        self.invalidations += len(stale)
+
+    def invalidate_slave(self, slave_id):
+        ranges = self._ranges.pop(slave_id, None)
+        if not ranges:
+            return
+        for request in ranges:
+            del self._responses[request]
+        self.invalidations += len(ranges)
+
+    def clear(self):
+        self._responses.clear()
+        self._ranges.clear()
@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from .const import DOMAIN
+
+# Stats are read on a timer instead of being pushed per frame, so a busy bus
+# causes no state writes of its own
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Add the bus diagnostic sensors, once per bus, to the entry that owns them."""
+    entry_data = hass.data[DOMAIN]["entries"].get(config_entry.entry_id)
+    if entry_data is None:
+        return
+    bus = entry_data["bus"]
+    # Kept so the sensors can move to this entry if their owner unloads first
+    bus.sensor_adders[config_entry.entry_id] = async_add_entities
+    if bus.stats_entry_id == config_entry.entry_id:
+        async_add_entities(bus_sensors(hass, bus))
+
+
+def bus_sensors(hass, bus):
+    """The diagnostic sensors of one bus."""
+    writes = hass.data[DOMAIN]["writes"]
+    stats = bus.stats
+    return [
+        FrameRateSensor(bus),
+        BusStatSensor(bus, "frames", "Frames received", lambda: stats.frames),
+        BusStatSensor(bus, "crc_errors", "CRC errors", lambda: stats.crc_errors),
+        BusStatSensor(bus, "unanswered", "Unanswered requests", lambda: stats.unanswered),
+        BusStatSensor(
+            bus, "exceptions", "Exception replies", lambda: stats.exceptions,
+            attributes=lambda: {"by_code": dict(sorted(stats.exception_codes.items()))},
+        ),
+        BusStatSensor(bus, "illegal_addresses", "Illegal data address replies", lambda: stats.illegal_addresses),
+        LatencySensor(bus, "latency_p50", "Reply latency p50", 0.5),
+        LatencySensor(bus, "latency_p99", "Reply latency p99", 0.99),
+        BusStatSensor(
+            bus, "write_queue_depth", "Write queue depth", lambda: writes.depth,
+            state_class=SensorStateClass.MEASUREMENT, attributes=lambda: writes.stats,
+        ),
+        BusStatSensor(
+            bus, "response_cache_hits", "Response cache hits", lambda: bus.registers.cache.hits,
+            attributes=lambda: bus.registers.cache.stats,
+        ),
+    ]
+
+
+class BusStatSensor(SensorEntity):
+    """A diagnostic sensor reading one number from a bus's statistics."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, bus, key, name, value, state_class=SensorStateClass.TOTAL_INCREASING, attributes=None):
+        self._bus = bus
+        self._value = value
+        self._attributes = attributes
+        self._attr_name = name
+        self._attr_unique_id = f"{bus.port}_{key}"
+        self._attr_state_class = state_class
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, bus.port)},
+            name=f"Modbus slave {bus.port}",
+        )
+
+    async def async_update(self):
+        self._attr_native_value = self._value()
+        if self._attributes is not None:
+            self._attr_extra_state_attributes = self._attributes()
+
+
+class FrameRateSensor(BusStatSensor):
+    """Frames per second received since the previous update."""
+
+    _attr_native_unit_of_measurement = "frames/s"
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, bus):
+        super().__init__(bus, "frame_rate", "Frames per second", None, state_class=SensorStateClass.MEASUREMENT)
+        self._last = None
+
+    async def async_update(self):
+        stats = self._bus.stats
+        now = time.monotonic()
+        if self._last is not None:
+            frames, since = self._last
+            self._attr_native_value = round((stats.frames - frames) / max(now - since, 1e-9), 2)
+        self._last = (stats.frames, now)
+        self._attr_extra_state_attributes = {
+            "by_function": {f"FC{function}": count for function, count in sorted(stats.by_function.items())},
+            "by_slave": dict(sorted(stats.by_slave.items())),
+        }
+
+
+class LatencySensor(BusStatSensor):
+    """Reply latency percentile, from the fixed-bucket histogram."""
+
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    def __init__(self, bus, key, name, fraction):
+        super().__init__(bus, key, name, None, state_class=SensorStateClass.MEASUREMENT)
+        self._fraction = fraction
+
+    async def async_update(self):
+        stats = self._bus.stats
+        self._attr_native_value = stats.latency_percentile(self._fraction)
+        self._attr_extra_state_attributes = {"histogram": stats.latency_histogram()}
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+
+_LOGGER = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 4096
+
+
+class SerialStream:
+    """Event-loop driven reader for an open pyserial port.
+
+    pyserial opens POSIX ports with O_NONBLOCK, so the file descriptor can be
+    watched with ``loop.add_reader``. Whenever the kernel reports data, all
+    bytes that are ready are read in one ``os.read`` call and handed to the
+    awaiting coroutine. No executor threads and no sleep-polling are involved.
+
+    Writes go straight to the fd as well; only bytes the driver cannot take
+    at once are copied and sent when the fd becomes writable.
+    """
+
+    def __init__(self, serial_conn, loop=None):
+        self._serial = serial_conn
+        self._fd = serial_conn.fileno()
+        self._loop = loop or asyncio.get_running_loop()
+        self._buffer = bytearray()
+        self._waiter = None
+        self._error = None
+        self._reading = False
+        self._out = bytearray()
+        self.last_rx_time = None
+        self._start_reading()
+
+    def _start_reading(self):
+        if not self._reading:
+            self._loop.add_reader(self._fd, self._on_readable)
+            self._reading = True
+
+    def _stop_reading(self):
+        if self._reading:
+            self._loop.remove_reader(self._fd)
+            self._reading = False
+
+    def _wakeup(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, READ_CHUNK_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fail(e)
+            return
+        if not data:
+            # A readable fd returning nothing means the device went away
+            self._fail(OSError(f"Serial port {self._serial.port} disconnected"))
+            return
+        self._buffer += data
+        self.last_rx_time = self._loop.time()
+        self._wakeup()
+
+    def _fail(self, exc):
+        # Stop watching the fd, otherwise a dead device keeps the loop spinning
+        self._stop_reading()
+        self._error = exc
+        self._wakeup()
+
+    def write(self, data):
+        """Send ``data`` without blocking. ``data`` may be reused as soon as this returns."""
+        if self._out:
+            self._out += data
+            return
+        try:
+            written = os.write(self._fd, data)
+        except (BlockingIOError, InterruptedError):
+            written = 0
+        if written < len(data):
+            self._out += data[written:]
+            self._loop.add_writer(self._fd, self._on_writable)
+
+    def _on_writable(self):
+        try:
+            written = os.write(self._fd, self._out)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._loop.remove_writer(self._fd)
+            self._out.clear()
+            self._fail(e)
+            return
+        del self._out[:written]
+        if not self._out:
+            self._loop.remove_writer(self._fd)
+
+    async def read(self, timeout=None):
+        """Wait for and return all bytes received since the previous call.
+
+        With ``timeout`` set, returns ``b''`` if nothing arrived in time.
+        """
+        if self._error is not None:
+            # Previous read failed; try to resume watching the port
+            self._error = None
+            self._start_reading()
+        if not self._buffer:
+            self._waiter = self._loop.create_future()
+            timer = None
+            if timeout is not None:
+                timer = self._loop.call_later(timeout, self._wakeup)
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+                if timer is not None:
+                    timer.cancel()
+            if self._error is not None:
+                raise self._error
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def close(self):
+        """Stop watching the port. The serial connection itself is not closed."""
+        self._stop_reading()
+        if self._out:
+            self._loop.remove_writer(self._fd)
+            self._out.clear()
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.cancel()
@@ -0,0 +1,237 @@
+import logging
+import os
+import struct
+import zlib
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import callback
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import DOMAIN
+from .registers import BIT_TABLES, REGISTER_COIL, REGISTER_DISCRETE_INPUT, REGISTER_HOLDING
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = f"{DOMAIN}.snapshot"
+# Seconds between a register change and the write that persists it
+SAVE_DELAY = 10
+
+_MAGIC = b"MBSS\x01"
+_TABLE_CODES = {REGISTER_HOLDING: 0, REGISTER_COIL: 1, REGISTER_DISCRETE_INPUT: 2}
+_TABLES = {code: table for table, code in _TABLE_CODES.items()}
+_port_header = struct.Struct(">HI")
+# slave id, table code, register address, word (or bit), source fingerprint
+_record = struct.Struct(">BBHHI")
+
+
+class RegisterSnapshot:
+    """Last known register values of every bus, kept in a small binary file in ``.storage``.
+
+    The file holds one section per port: the port name, then a 10-byte
+    record per address. It is loaded once, before any bus starts
+    answering, and entries take their values from it as they are added so
+    masters never see the zeros of a fresh register image. Changes are
+    written back at most every ``SAVE_DELAY`` seconds, in the executor, and
+    once more when Home Assistant shuts down.
+
+    Each value carries a fingerprint of the entry it came from (table, data
+    type, scale and source), and is only restored to an entry with the same
+    one, so an address mapped to something else never starts out with an
+    unrelated old value. Values of removed entries are dropped by
+    ``forget``.
+    """
+
+    def __init__(self, hass):
+        self._hass = hass
+        self._path = hass.config.path(STORAGE_DIR, SNAPSHOT_FILE)
+        # port -> {(slave_id, table, register_addr): (word, fingerprint)}
+        self._restored = {}
+        # key of an entry unloaded since startup -> (port, {address: (word, fingerprint)}) that keep() stored
+        self._kept = {}
+        self._buses = {}
+        self._load_task = None
+        self._save_handle = None
+
+    async def async_load(self):
+        """Read the snapshot file; safe to await from every entry, it is only read once."""
+        if self._load_task is None:
+            self._load_task = self._hass.async_create_task(self._async_load())
+            self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write)
+        await self._load_task
+
+    async def _async_load(self):
+        try:
+            data = await self._hass.async_add_executor_job(_read_file, self._path)
+        except OSError as e:
+            _LOGGER.warning(f"Could not read register snapshot {self._path}: {e}")
+            return
+        if data is None:
+            return
+        try:
+            self._restored = _decode(data)
+        except (ValueError, KeyError, struct.error) as e:
+            _LOGGER.warning(f"Ignoring corrupt register snapshot {self._path}: {e}")
+            return
+        _LOGGER.debug(f"Loaded register snapshot for {len(self._restored)} port(s)")
+
+    def attach(self, bus):
+        """Persist ``bus``'s registers from now on."""
+        self._buses[bus.port] = bus
+        bus.registers.on_change = self.schedule_save
+
+    def detach(self, bus):
+        """Stop following ``bus``; call ``keep`` for its entries as they are removed."""
+        if self._buses.pop(bus.port, None) is None:
+            return
+        bus.registers.on_change = None
+        self.schedule_save()
+
+    def keep(self, key, entry):
+        """Remember the value of an entry that is about to be unloaded, for when it is set up again."""
+        slave_id = entry["slave_id"]
+        table = entry.get("register_type") or REGISTER_HOLDING
+        register_addr = entry["register_addr"]
+        if entry["bus"].registers.get(slave_id, register_addr, table) is not entry:
+            return
+        fingerprint = _fingerprint(entry)
+        if table in BIT_TABLES:
+            slots = {(slave_id, table, register_addr): (1 if entry["value"] else 0, fingerprint)}
+        else:
+            data = entry["codec"].pack(entry["value"])
+            slots = {
+                (slave_id, table, register_addr + i): (int.from_bytes(data[2 * i:2 * i + 2], "big"), fingerprint)
+                for i in range(len(data) // 2)
+            }
+        self._restored.setdefault(entry["serial_port"], {}).update(slots)
+        self._kept[key] = (entry["serial_port"], slots)
+
+    def forget(self, entry_id):
+        """Drop the values kept for a config entry that was removed, and for each of its register map rows."""
+        prefix = f"{entry_id}:"
+        for key in [key for key in self._kept if key == entry_id or key.startswith(prefix)]:
+            port, slots = self._kept.pop(key)
+            words = self._restored.get(port, {})
+            for address, slot in slots.items():
+                # Unless another entry has kept its own value there since
+                if words.get(address) == slot:
+                    del words[address]
+        self.schedule_save()
+
+    def restore(self, entry):
+        """Give a freshly indexed entry its last known value; return True if there was one."""
+        words = self._restored.get(entry["serial_port"])
+        if not words:
+            return False
+        slave_id = entry["slave_id"]
+        table = entry.get("register_type") or REGISTER_HOLDING
+        register_addr = entry["register_addr"]
+        fingerprint = _fingerprint(entry)
+        count = 1 if table in BIT_TABLES else entry["codec"].registers
+        data = bytearray()
+        for addr in range(register_addr, register_addr + count):
+            slot = words.get((slave_id, table, addr))
+            if slot is None or slot[1] != fingerprint:
+                return False
+            data += slot[0].to_bytes(2, "big")
+        value = data[1] if table in BIT_TABLES else entry["codec"].unpack(data)
+        entry["bus"].registers.set_value(entry, value)
+        entry["restored"] = True
+        return True
+
+    @callback
+    def schedule_save(self):
+        if self._save_handle is None:
+            self._save_handle = self._hass.loop.call_later(SAVE_DELAY, self._save)
+
+    @callback
+    def _save(self):
+        self._save_handle = None
+        self._hass.async_create_background_task(self.async_save(), name="modbus_slave snapshot")
+
+    async def async_save(self):
+        """Write the snapshot now."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        sections = dict(self._restored)
+        for port, bus in self._buses.items():
+            # Values of entries removed since startup stay until their addresses are used again
+            sections[port] = {**sections.get(port, {}), **_current(bus)}
+        try:
+            await self._hass.async_add_executor_job(_write_file, self._path, _encode(sections))
+        except OSError as e:
+            _LOGGER.warning(f"Could not write register snapshot {self._path}: {e}")
+
+    async def _async_final_write(self, event):
+        await self.async_save()
+
+
+def _fingerprint(entry):
+    """A stable checksum of what an entry's value means: its table, data type, scale and source."""
+    codec = entry["codec"]
+    source = (
+        entry.get("register_type") or REGISTER_HOLDING, codec.data_type, codec.scale,
+        entry["read_entity"] or "", entry["read_attribute"] or "", "" if entry["read_entity"] else entry["template"],
+    )
+    return zlib.crc32("\x1f".join(map(str, source)).encode())
+
+
+def _current(bus):
+    registers = bus.registers
+    fingerprints = {}
+    current = {}
+    for slave_id, table, addr, word in registers.words():
+        entry = registers.get(slave_id, addr, table)
+        fingerprint = fingerprints.get(id(entry))
+        if fingerprint is None:
+            fingerprint = fingerprints[id(entry)] = _fingerprint(entry)
+        current[(slave_id, table, addr)] = (word, fingerprint)
+    return current
+
+
+def _encode(sections):
+    parts = [_MAGIC]
+    for port, words in sections.items():
+        name = port.encode()
+        parts.append(_port_header.pack(len(name), len(words)))
+        parts.append(name)
+        parts.extend(
+            _record.pack(slave_id, _TABLE_CODES[table], addr, word, fingerprint)
+            for (slave_id, table, addr), (word, fingerprint) in words.items()
+        )
+    return b"".join(parts)
+
+
+def _decode(data):
+    if not data.startswith(_MAGIC):
+        raise ValueError("unknown format")
+    sections = {}
+    offset = len(_MAGIC)
+    while offset < len(data):
+        name_length, count = _port_header.unpack_from(data, offset)
+        offset += _port_header.size
+        port = data[offset:offset + name_length].decode()
+        offset += name_length
+        words = sections[port] = {}
+        for slave_id, code, addr, word, fingerprint in _record.iter_unpack(data[offset:offset + count * _record.size]):
+            words[(slave_id, _TABLES[code], addr)] = (word, fingerprint)
+        offset += count * _record.size
+        if len(words) != count:
+            raise ValueError("truncated")
+    return sections
+
+
+def _read_file(path):
+    try:
+        with open(path, "rb") as snapshot:
+            return snapshot.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as snapshot:
+        snapshot.write(data)
+    os.replace(temp_path, path)
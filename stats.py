@@ -0,0 +1,104 @@
+from bisect import bisect_left
+
+# Exception code of a request for an address no entry backs
+ILLEGAL_DATA_ADDRESS = 2
+# Upper bounds of the reply latency buckets, in seconds; a last bucket takes the rest
+LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5)
+
+
+class BusStats:
+    """Counters for one bus, cheap enough to update on every frame.
+
+    Recording is a few integer and dict increments plus a bisect into fixed
+    latency buckets. Percentiles and the other derived numbers are only
+    worked out when something reads them.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.replies = 0
+        self.exceptions = 0
+        # exception code -> replies with it
+        self.exception_codes = {}
+        self.unanswered = 0
+        # Frames for slave IDs this bus does not serve; they are also unanswered
+        self.other_slaves = 0
+        self.crc_errors = 0
+        self.by_function = {}
+        self.by_slave = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, slave_id, function, reply_function, latency, reply_code=0):
+        """Count one request; ``reply_function`` is None when it got no reply.
+
+        ``reply_code`` is the byte after the reply's function code, so the
+        exception code of an exception reply.
+        """
+        self.frames += 1
+        by_function = self.by_function
+        by_function[function] = by_function.get(function, 0) + 1
+        by_slave = self.by_slave
+        by_slave[slave_id] = by_slave.get(slave_id, 0) + 1
+        if reply_function is None:
+            self.unanswered += 1
+            return
+        self.replies += 1
+        if reply_function & 0x80:
+            self.exceptions += 1
+            exception_codes = self.exception_codes
+            exception_codes[reply_code] = exception_codes.get(reply_code, 0) + 1
+        self.latency[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def record_other_slaves(self, counts):
+        """Count the frames a framer skipped, given as ``{(slave_id, function): frames}``."""
+        by_function = self.by_function
+        by_slave = self.by_slave
+        for (slave_id, function), count in counts.items():
+            by_function[function] = by_function.get(function, 0) + count
+            by_slave[slave_id] = by_slave.get(slave_id, 0) + count
+            self.frames += count
+            self.unanswered += count
+            self.other_slaves += count
+
+    @property
+    def illegal_addresses(self):
+        """Exception replies for addresses no entry backs."""
+        return self.exception_codes.get(ILLEGAL_DATA_ADDRESS, 0)
+
+    def latency_percentile(self, fraction):
+        """Upper bound, in ms, of the bucket holding the given fraction of replies.
+
+        Returns None before the first reply, or when the percentile falls in
+        the open-ended last bucket.
+        """
+        total = sum(self.latency)
+        if not total:
+            return None
+        target = fraction * total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency):
+            seen += count
+            if seen >= target:
+                return bound * 1000
+        return None
+
+    def latency_histogram(self):
+        histogram = {f"<={bound * 1000:g}ms": count for bound, count in zip(LATENCY_BUCKETS, self.latency)}
+        histogram[f">{LATENCY_BUCKETS[-1] * 1000:g}ms"] = self.latency[-1]
+        return histogram
+
+    def snapshot(self):
+        return {
+            "frames": self.frames,
+            "replies": self.replies,
+            "exceptions": self.exceptions,
+            "exception_codes": dict(sorted(self.exception_codes.items())),
+            "unanswered": self.unanswered,
+            "other_slaves": self.other_slaves,
+            "crc_errors": self.crc_errors,
+            "by_function": {f"FC{function}": count for function, count in sorted(self.by_function.items())},
+            "by_slave": dict(sorted(self.by_slave.items())),
+            "latency_p50_ms": self.latency_percentile(0.5),
+            "latency_p99_ms": self.latency_percentile(0.99),
+            "latency_histogram": self.latency_histogram(),
+        }
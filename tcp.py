@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import struct
+from urllib.parse import parse_qs, urlsplit
+
+from .registers import RegisterIndex
+from .stats import BusStats
+from .traffic import TrafficSummary
+
+_LOGGER = logging.getLogger(__name__)
+
+FRAMING_MBAP = "tcp"
+FRAMING_RTU_OVER_TCP = "rtu-over-tcp"
+DEFAULT_TCP_PORT = 502
+DEFAULT_MAX_CONNECTIONS = 10
+# RTU-over-TCP frames arrive in TCP segments, not on a timed line
+TCP_GAP_TOLERANCE = 0.1
+
+MBAP_HEADER_SIZE = 7
+# Unit id plus the largest PDU (253 bytes)
+MAX_MBAP_LENGTH = 254
+
+_mbap_header = struct.Struct('>HHHB')
+_pack_mbap_prefix = struct.Struct('>HHH').pack_into
+
+
+def is_tcp_port(port):
+    """Whether a configured port names a TCP listener rather than a serial device."""
+    return urlsplit(str(port)).scheme in (FRAMING_MBAP, FRAMING_RTU_OVER_TCP)
+
+
+def parse_tcp_port(port):
+    """Split ``tcp://host:port?max_connections=N`` into (framing, host, port, max_connections).
+
+    ``rtu-over-tcp://`` selects RTU framing (with CRC) on the socket instead
+    of the MBAP header. An empty host listens on every interface.
+    """
+    url = urlsplit(str(port))
+    if url.scheme not in (FRAMING_MBAP, FRAMING_RTU_OVER_TCP):
+        raise ValueError(f"Not a Modbus TCP port: {port}")
+    query = parse_qs(url.query)
+    max_connections = int(query.get("max_connections", [DEFAULT_MAX_CONNECTIONS])[0])
+    if max_connections < 1:
+        raise ValueError(f"max_connections must be at least 1: {port}")
+    return url.scheme, url.hostname or None, url.port or DEFAULT_TCP_PORT, max_connections
+
+
+class MbapFramer:
+    """Split a Modbus TCP byte stream into requests.
+
+    ``feed`` returns ``(transaction_id, request)`` pairs, where ``request`` is the
+    unit id followed by the PDU, the same layout as an RTU frame without its
+    CRC. Every complete request in the data is returned, so pipelined
+    requests are answered in order without waiting for the next read.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        requests = []
+        offset = 0
+        while len(buffer) - offset >= MBAP_HEADER_SIZE:
+            transaction_id, protocol_id, length, _ = _mbap_header.unpack_from(buffer, offset)
+            if protocol_id != 0 or not 2 <= length <= MAX_MBAP_LENGTH:
+                raise ValueError(f"Invalid MBAP header (protocol {protocol_id}, length {length})")
+            end = offset + 6 + length
+            if end > len(buffer):
+                break
+            requests.append((transaction_id, bytes(buffer[offset + 6:end])))
+            offset = end
+        del buffer[:offset]
+        return requests
+
+    @staticmethod
+    def build(out, transaction_id, length):
+        """Fill in the MBAP header for a ``length``-byte response already at ``out[6:]``.
+
+        Returns the length of the finished frame.
+        """
+        _pack_mbap_prefix(out, 0, transaction_id, 0, length)
+        return 6 + length
+
+
+class ModbusTcpBus:
+    """A Modbus TCP or RTU-over-TCP listener with its own register index.
+
+    Drop-in for ``ModbusBus``: entries whose port is a ``tcp://`` or
+    ``rtu-over-tcp://`` URL share one listener, and each accepted master
+    connection runs ``handler(hass, bus, reader, writer)`` as its own task.
+    Connections beyond ``max_connections`` are closed as soon as they are
+    accepted.
+
+    Given a ``serves`` bus, the listener has no registers of its own: TCP
+    masters read and write that bus's register index, and their requests
+    count in its stats and traffic summary.
+    """
+
+    def __init__(self, port, baudrate, serves=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.framing, self.host, self.tcp_port, self.max_connections = parse_tcp_port(port)
+        self.serves = serves
+        if serves is None:
+            self.registers = RegisterIndex()
+            self.traffic = TrafficSummary(port)
+            self.stats = BusStats()
+        else:
+            self.registers = serves.registers
+            self.traffic = serves.traffic
+            self.stats = serves.stats
+        # Entry whose sensor platform shows this bus's diagnostic sensors
+        self.stats_entry_id = None
+        # entry_id -> async_add_entities of its sensor platform
+        self.sensor_adders = {}
+        # Replies are built here in place; room for either framing
+        self.response = bytearray(6 + MAX_MBAP_LENGTH)
+        self.entry_ids = set()
+        self.server = None
+        # connection task -> its writer
+        self.connections = {}
+        self.rejected_connections = 0
+        self._hass = None
+        self._handler = None
+
+    def __repr__(self):
+        return f"<ModbusTcpBus {self.port}>"
+
+    async def async_open(self, hass):
+        """Bind the listening socket if it is not bound yet."""
+        if self.server is not None:
+            return
+        self.server = await asyncio.start_server(self._on_connect, self.host, self.tcp_port)
+        _LOGGER.info(f"Listening for Modbus {self.framing} masters on {self.host or '*'}:{self.tcp_port}")
+
+    def start(self, hass, handler):
+        """Serve accepted connections with ``handler``."""
+        self._hass = hass
+        self._handler = handler
+
+    async def _on_connect(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        if self._handler is None or len(self.connections) >= self.max_connections:
+            self.rejected_connections += 1
+            _LOGGER.warning("Refusing Modbus connection from %s: limit of %d reached on %s", peer, self.max_connections, self.port)
+            writer.close()
+            return
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        _LOGGER.debug(f"Modbus master connected from {peer} on {self.port}")
+        try:
+            await self._handler(self._hass, self, reader, writer)
+        finally:
+            self.connections.pop(task, None)
+            writer.close()
+            _LOGGER.debug(f"Modbus master {peer} disconnected from {self.port}")
+
+    async def async_close(self, hass):
+        """Stop listening and drop every open connection."""
+        if self.server is not None:
+            self.server.close()
+        # Closing the transport ends the handler's read loop; cancelling the
+        # task instead would make asyncio log the cancellation as an error
+        connections = list(self.connections.items())
+        for _, writer in connections:
+            writer.close()
+        if connections:
+            await asyncio.gather(*(task for task, _ in connections), return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+            self.server = None
+        self._handler = None
+        if self.serves is None:
+            self.traffic.close()
@@ -0,0 +1,122 @@
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import TrackTemplate, async_track_template_result
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Batch:
+    """One ``async_track_template_result`` subscription and the keys listening to each of its templates."""
+
+    __slots__ = ("info", "listeners")
+
+    def __init__(self):
+        self.info = None
+        # template -> keys reported for it
+        self.listeners = {}
+
+
+class SharedTemplateTracker:
+    """Batched ``async_track_template_result`` subscriptions for every template register.
+
+    Templates added in the same event-loop iteration (e.g. all entries
+    loading at startup) are subscribed together, with one ``TrackTemplate``
+    per distinct template text and rate limit; every key using that
+    template is reported its results. Later additions get a subscription of
+    their own, so existing ones are never torn down or re-rendered.
+    Removing a key only stops its reports; a subscription is dropped once
+    none of its keys are left.
+
+    Home Assistant's ``Template`` compares by its text, so registrations are
+    tracked per key, never by template.
+    """
+
+    def __init__(self, hass, on_result):
+        self._hass = hass
+        self._on_result = on_result
+        # key -> (template, rate_limit), waiting for the next subscribe
+        self._pending = {}
+        # key -> batch it is subscribed in
+        self._batch_of = {}
+        self._subscribe_handle = None
+
+    def __len__(self):
+        return len(self._pending) + len(self._batch_of)
+
+    @property
+    def subscriptions(self):
+        return len({id(batch) for batch in self._batch_of.values()})
+
+    def add(self, key, template, rate_limit=None):
+        """Track ``template`` and report its results for ``key``."""
+        self.remove(key)
+        self._pending[key] = (template, rate_limit)
+        if self._subscribe_handle is None:
+            self._subscribe_handle = self._hass.loop.call_soon(self._subscribe)
+
+    def remove(self, key):
+        if self._pending.pop(key, None) is not None:
+            return
+        batch = self._batch_of.pop(key, None)
+        if batch is None:
+            return
+        for template, keys in batch.listeners.items():
+            if key in keys:
+                keys.remove(key)
+                if not keys:
+                    del batch.listeners[template]
+                break
+        if not batch.listeners and batch.info is not None:
+            batch.info.async_remove()
+            batch.info = None
+
+    def stop(self):
+        if self._subscribe_handle is not None:
+            self._subscribe_handle.cancel()
+            self._subscribe_handle = None
+        self._pending.clear()
+        for batch in set(self._batch_of.values()):
+            if batch.info is not None:
+                batch.info.async_remove()
+                batch.info = None
+        self._batch_of.clear()
+
+    @callback
+    def _subscribe(self):
+        self._subscribe_handle = None
+        pending, self._pending = self._pending, {}
+        # Keys sharing a template text and rate limit share one TrackTemplate;
+        # one subscription cannot hold two equal templates, so other rate
+        # limits for the same text go to a further batch
+        groups = {}
+        for key, (template, rate_limit) in pending.items():
+            groups.setdefault((template, rate_limit), []).append(key)
+        batches = []
+        for (template, rate_limit), keys in groups.items():
+            for batch, track_templates in batches:
+                if template not in batch.listeners:
+                    break
+            else:
+                batch, track_templates = _Batch(), []
+                batches.append((batch, track_templates))
+            batch.listeners[template] = keys
+            track_templates.append(TrackTemplate(template, None, rate_limit))
+            for key in keys:
+                self._batch_of[key] = batch
+        for batch, track_templates in batches:
+            batch.info = async_track_template_result(self._hass, track_templates, self._make_listener(batch))
+            _LOGGER.debug("Tracking %d register template(s) with one subscription", len(track_templates))
+
+    def _make_listener(self, batch):
+        listeners = batch.listeners
+
+        @callback
+        def listener(event, updates):
+            for update in updates:
+                keys = listeners.get(update.template)
+                if keys:
+                    for key in tuple(keys):
+                        self._on_result(key, update.result)
+
+        return listener
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SUMMARY_INTERVAL = 60
+MAX_SUMMARY_ITEMS = 20
+# Pseudo function code for values pushed from Home Assistant into a register
+HA_UPDATE = 0
+
+
+class TrafficSummary:
+    """Per-register traffic counts for one bus, logged as one INFO line per interval.
+
+    Recording is a dict increment, and is skipped entirely unless INFO is
+    enabled for this logger. The first record after a flush schedules the
+    next one, so an idle bus logs nothing.
+    """
+
+    def __init__(self, name, interval=DEFAULT_SUMMARY_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self._counts = {}
+        self._handle = None
+
+    def record(self, slave_id, function, register_addr):
+        if not _LOGGER.isEnabledFor(logging.INFO):
+            return
+        key = (slave_id, register_addr, function)
+        counts = self._counts
+        counts[key] = counts.get(key, 0) + 1
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self.interval, self.flush)
+
+    def record_request(self, request):
+        """Count a request given as slave id + PDU (an RTU frame works too)."""
+        if len(request) >= 4 and _LOGGER.isEnabledFor(logging.INFO):
+            self.record(request[0], request[1], (request[2] << 8) | request[3])
+
+    def flush(self):
+        self._handle = None
+        counts, self._counts = self._counts, {}
+        if not counts:
+            return
+        items = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        parts = [
+            "Slave %d Reg %d %s %d" % (slave_id, register_addr, "updates" if function == HA_UPDATE else "FC%d" % function, count)
+            for (slave_id, register_addr, function), count in items[:MAX_SUMMARY_ITEMS]
+        ]
+        if len(items) > MAX_SUMMARY_ITEMS:
+            parts.append("(+%d more)" % (len(items) - MAX_SUMMARY_ITEMS))
+        _LOGGER.info("Modbus traffic on %s in the last %ss: %s", self.name, self.interval, ", ".join(parts))
+
+    def close(self):
+        """Log what is left and stop the timer."""
+        if self._handle is not None:
+            self._handle.cancel()
+        self.flush()